@@ -0,0 +1,183 @@
+"""Symptom analysis and chatbot answers on top of the configured model backend"""
+import streamlit as st
+
+from knowledge_base import get_knowledge_base
+from metrics import REGISTRY
+from model_backend import RuleBasedBackend, create_backend
+from profiler import timed
+
+TRIAGE_CALLS = REGISTRY.counter('aegis_triage_calls_total', 'Symptom analyses by resulting severity', labels=('severity',))
+TRIAGE_SECONDS = REGISTRY.histogram('aegis_triage_seconds', 'Symptom analysis latency')
+CHATBOT_LOOKUPS = REGISTRY.counter('aegis_chatbot_lookups_total', 'Chatbot questions answered', labels=('user_type',))
+
+# Enhanced medical diagnosis with more comprehensive analysis
+def rule_based_analyze_symptoms(symptoms_text, user_type='patient'):
+    """Enhanced symptom analysis with user type consideration"""
+    symptoms_lower = symptoms_text.lower()
+    
+    # Emergency conditions
+    emergency_keywords = [
+        'chest pain', 'difficulty breathing', 'severe headache', 'stroke', 'heart attack', 
+        'unconscious', 'severe bleeding', 'poisoning', 'overdose', 'seizure',
+        'anaphylaxis', 'severe allergic reaction', 'choking', 'cardiac arrest'
+    ]
+    
+    # High-risk conditions
+    high_risk_keywords = [
+        'fever over 103', 'persistent vomiting', 'severe abdominal pain', 
+        'difficulty swallowing', 'severe dehydration', 'diabetic emergency',
+        'severe burns', 'head trauma', 'loss of consciousness'
+    ]
+    
+    # Medium risk conditions
+    medium_risk_keywords = [
+        'moderate fever', 'persistent cough', 'shortness of breath', 'severe pain',
+        'blood in stool', 'blood in urine', 'severe diarrhea', 'fainting'
+    ]
+    
+    # Common conditions
+    cold_keywords = ['runny nose', 'sneezing', 'mild fever', 'cough', 'sore throat']
+    digestive_keywords = ['nausea', 'stomach pain', 'diarrhea', 'indigestion', 'heartburn']
+    musculoskeletal_keywords = ['back pain', 'joint pain', 'muscle ache', 'stiffness']
+    mental_health_keywords = ['anxiety', 'depression', 'stress', 'panic attack', 'insomnia']
+    
+    diagnosis = "General consultation needed"
+    severity = "Low"
+    recommendations = []
+    professional_note = ""
+    
+    # Add professional context based on user type
+    if user_type == 'medical_student':
+        professional_note = "\n📚 Educational Context: Consider differential diagnoses and evidence-based treatment protocols."
+    elif user_type == 'healthcare_professional':
+        professional_note = "\n👩‍⚕️ Professional Assessment: Review clinical guidelines and consider patient comorbidities."
+    
+    # Check for emergency conditions
+    if any(keyword in symptoms_lower for keyword in emergency_keywords):
+        diagnosis = "⚠️ EMERGENCY CONDITION DETECTED"
+        severity = "CRITICAL"
+        recommendations = [
+            "🚨 CALL 911 IMMEDIATELY",
+            "Go to the nearest emergency room",
+            "Do not drive yourself - call ambulance",
+            "Have someone stay with you",
+            "Prepare list of current medications",
+            "Stay calm and follow emergency operator instructions"
+        ]
+    
+    # Check for high-risk conditions
+    elif any(keyword in symptoms_lower for keyword in high_risk_keywords):
+        diagnosis = "High-risk condition - Urgent medical attention needed"
+        severity = "High"
+        recommendations = [
+            "Seek immediate medical attention within 2-4 hours",
+            "Visit urgent care or emergency room",
+            "Contact your primary care physician immediately",
+            "Monitor symptoms closely and call 911 if worsening",
+            "Avoid eating or drinking until medical evaluation",
+            "Have someone available to drive you to medical facility"
+        ]
+    
+    # Check for medium-risk conditions
+    elif any(keyword in symptoms_lower for keyword in medium_risk_keywords):
+        diagnosis = "Moderate concern - Medical evaluation recommended within 24 hours"
+        severity = "Medium"
+        recommendations = [
+            "Schedule appointment with healthcare provider within 24 hours",
+            "Monitor symptoms and seek urgent care if worsening",
+            "Take temperature regularly and keep symptom log",
+            "Stay hydrated and rest",
+            "Avoid strenuous activities"
+        ]
+    
+    # Check for common conditions
+    elif any(keyword in symptoms_lower for keyword in cold_keywords):
+        diagnosis = "Possible common cold or upper respiratory infection"
+        severity = "Low"
+        recommendations = [
+            "Rest and stay well hydrated with warm fluids",
+            "Use over-the-counter medications as directed",
+            "Gargle with warm salt water for sore throat",
+            "Use humidifier to ease congestion",
+            "See a doctor if symptoms worsen or persist beyond 7-10 days",
+            "Isolate to prevent spreading to others"
+        ]
+    
+    elif any(keyword in symptoms_lower for keyword in digestive_keywords):
+        diagnosis = "Possible digestive issue or gastroenteritis"
+        severity = "Low"
+        recommendations = [
+            "Stay hydrated with clear fluids and electrolyte solutions",
+            "Follow BRAT diet (bananas, rice, applesauce, toast)",
+            "Avoid dairy, caffeine, alcohol, and fatty foods",
+            "Rest and allow digestive system to recover",
+            "See a doctor if symptoms persist beyond 48 hours",
+            "Seek immediate care if signs of severe dehydration appear"
+        ]
+    
+    elif any(keyword in symptoms_lower for keyword in musculoskeletal_keywords):
+        diagnosis = "Possible musculoskeletal condition or injury"
+        severity = "Low"
+        recommendations = [
+            "Apply RICE protocol: Rest, Ice, Compression, Elevation",
+            "Use over-the-counter anti-inflammatory medications as directed",
+            "Gentle stretching and movement as tolerated",
+            "Heat therapy after initial 48 hours if helpful",
+            "See a doctor if pain is severe or persists beyond a week",
+            "Physical therapy may be beneficial for chronic issues"
+        ]
+    
+    elif any(keyword in symptoms_lower for keyword in mental_health_keywords):
+        diagnosis = "Possible mental health concern"
+        severity = "Medium"
+        recommendations = [
+            "Consider speaking with a mental health professional",
+            "Practice stress reduction techniques (meditation, deep breathing)",
+            "Maintain regular sleep schedule and healthy diet",
+            "Stay connected with supportive friends and family",
+            "Contact crisis helpline if having thoughts of self-harm: 988",
+            "Regular exercise can help improve mood and reduce anxiety"
+        ]
+    
+    return diagnosis, severity, recommendations, professional_note
+
+# Enhanced chatbot backed by the vetted-article knowledge base
+def rule_based_chatbot_stream(question, user_type='patient'):
+    """Yield the best-matching knowledge base article in chunks"""
+    article = get_knowledge_base().best_article(question)
+    yield f"{article['icon']} **{article['title']}:**\n        \n"
+    for line in article['body'].splitlines(keepends=True):
+        yield line
+
+# Model backend (rules by default, optionally a local inference server)
+@st.cache_resource(show_spinner=False)
+def get_model_backend():
+    rules = RuleBasedBackend(rule_based_analyze_symptoms, rule_based_chatbot_stream)
+    return create_backend(rules)
+
+@timed('analyze_symptoms')
+def analyze_symptoms(symptoms_text, user_type='patient'):
+    """Analyze symptoms with the configured model backend"""
+    with TRIAGE_SECONDS.time():
+        result = get_model_backend().analyze(symptoms_text, user_type)
+    TRIAGE_CALLS.inc(severity=result[1])
+    return result
+
+def medical_chatbot_response_stream(question, user_type='patient'):
+    """Yield the chatbot answer in chunks as soon as each part is available"""
+    CHATBOT_LOOKUPS.inc(user_type=user_type)
+    response_prefix = ""
+    if user_type == 'medical_student':
+        response_prefix = "📚 **Educational Response:** "
+    elif user_type == 'healthcare_professional':
+        response_prefix = "👩‍⚕️ **Professional Insight:** "
+    
+    # The prefix does not depend on the backend, so it goes out first
+    if response_prefix:
+        yield response_prefix
+    
+    yield from get_model_backend().chat_stream(question, user_type)
+
+def medical_chatbot_response(question, user_type='patient'):
+    """Enhanced medical chatbot with user type consideration"""
+    return "".join(medical_chatbot_response_stream(question, user_type))
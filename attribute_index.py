@@ -0,0 +1,70 @@
+"""Bitset index over facility attributes.
+
+Each specialty and the emergency flag get one bitset (packed into uint64
+words) over facility rows, and ratings are kept as a sorted array with the
+matching row order. A compound filter is then a few bitwise ORs/ANDs plus
+one binary search, and is tested against a spatial candidate set before any
+facility record is materialized.
+"""
+import numpy as np
+
+_WORD_BITS = 64
+
+
+def bitset_from_indices(indices, size):
+    """Pack row indices into a bitset of `size` bits"""
+    words = np.zeros(-(-size // _WORD_BITS), dtype=np.uint64)
+    indices = np.asarray(indices, dtype=np.uint64)
+    np.bitwise_or.at(words, (indices // _WORD_BITS).astype(np.intp),
+                     np.left_shift(np.uint64(1), indices % np.uint64(_WORD_BITS)))
+    return words
+
+
+def bitset_contains(words, indices):
+    """Boolean array: is each row index set in the bitset"""
+    indices = np.asarray(indices, dtype=np.uint64)
+    bits = np.right_shift(words[(indices // _WORD_BITS).astype(np.intp)], indices % np.uint64(_WORD_BITS))
+    return (bits & np.uint64(1)).astype(bool)
+
+
+def bitset_indices(words, size):
+    """Row indices set in the bitset, ascending"""
+    bits = np.unpackbits(words.view(np.uint8), bitorder='little')[:size]
+    return np.flatnonzero(bits)
+
+
+class AttributeIndex:
+    """Specialty/emergency bitsets and a sorted rating array for a FacilityStore"""
+
+    def __init__(self, store):
+        self.size = len(store)
+        self.specialty_names = list(store.specialty_names)
+        self._specialty_codes = {name: code for code, name in enumerate(self.specialty_names)}
+
+        rows = np.repeat(np.arange(self.size), np.diff(np.asarray(store.spec_offsets, dtype=np.int64)))
+        codes = np.asarray(store.spec_codes)
+        self._specialty_bits = [bitset_from_indices(rows[codes == code], self.size)
+                                for code in range(len(self.specialty_names))]
+        self._emergency_bits = bitset_from_indices(np.flatnonzero(store.emergency), self.size)
+
+        ratings = np.asarray(store.ratings)
+        self._rating_order = np.argsort(ratings, kind='stable')
+        self._sorted_ratings = ratings[self._rating_order]
+
+    def mask(self, emergency_only=False, specialties=(), min_rating=None):
+        """Bitset of rows passing every filter, or None when nothing is filtered"""
+        words = None
+        if emergency_only:
+            words = self._emergency_bits.copy()
+        if specialties:
+            any_spec = np.zeros_like(self._emergency_bits)
+            for name in specialties:
+                code = self._specialty_codes.get(name)
+                if code is not None:
+                    any_spec |= self._specialty_bits[code]
+            words = any_spec if words is None else words & any_spec
+        if min_rating is not None:
+            start = np.searchsorted(self._sorted_ratings, np.float32(min_rating), side='left')
+            rated = bitset_from_indices(self._rating_order[start:], self.size)
+            words = rated if words is None else words & rated
+        return words
@@ -0,0 +1,58 @@
+"""Cold-start budget for the Streamlit entry point.
+
+Imports app.py in fresh interpreters and fails when the best of several runs
+goes over the time budget, or when a heavy dependency is loaded before any
+page asks for it (pages in views/ import those on first visit).
+
+    python check_import_budget.py [budget_seconds]
+"""
+import os
+import sys
+import json
+import subprocess
+
+DEFAULT_BUDGET_SECONDS = float(os.environ.get('AEGIS_IMPORT_BUDGET', '0.8'))
+RUNS = 5
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'folium', 'reportlab', 'pyarrow')
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+streamlit_done = time.perf_counter()
+import app
+done = time.perf_counter()
+print(json.dumps({{
+    'streamlit': streamlit_done - start,
+    'app': done - start,
+    'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(runs=RUNS):
+    """Best-of-runs import timings (seconds) and the heavy modules any run loaded"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _PROBE], cwd=root, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        'streamlit': min(r['streamlit'] for r in results),
+        'app': min(r['app'] for r in results),
+        'heavy': sorted({m for r in results for m in r['heavy']}),
+    }
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_SECONDS
+    result = measure()
+    print(f"import streamlit: {result['streamlit']:.3f}s  import app: {result['app']:.3f}s  budget: {budget:.3f}s")
+    failures = []
+    if result['app'] > budget:
+        failures.append(f"import app took {result['app']:.3f}s, over the {budget:.3f}s budget")
+    if result['heavy']:
+        failures.append(f"import app loaded {', '.join(result['heavy'])}; import them inside the page that needs them")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
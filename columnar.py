@@ -0,0 +1,85 @@
+"""Single-file columnar container for read-only numpy arrays.
+
+Layout: magic, uint32 header length, JSON header (padded to 8 bytes), then
+each array's raw bytes padded to 8 bytes. ``map_sections`` memory-maps the
+file and returns zero-copy numpy views, so every process that opens the
+same file shares one copy of its pages.
+"""
+import os
+import json
+import mmap
+import struct
+import tempfile
+
+import numpy as np
+
+_HEADER_LEN = struct.Struct('<I')
+_ALIGN = 8
+
+
+def write_sections(path, magic, header, sections):
+    """Atomically write [(name, array)] plus a JSON-able header dict to path"""
+    header = dict(header, sections={})
+    offset = 0
+    for name, array in sections:
+        header['sections'][name] = [offset, array.dtype.str, len(array)]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    padding = -(len(magic) + _HEADER_LEN.size + len(header_bytes)) % _ALIGN
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # A private temp name per writer: several processes may rebuild the same file at cold start
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(magic + _HEADER_LEN.pack(len(header_bytes) + padding) + header_bytes + b' ' * padding)
+            for _, array in sections:
+                data = np.ascontiguousarray(array).tobytes()
+                f.write(data + b'\0' * (-len(data) % _ALIGN))
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def map_sections(path, magic):
+    """Memory-map path and return (header, {name: array}, mmap)"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(magic)] != magic:
+        raise ValueError(f"{path} is not a {magic.decode(errors='replace')} file")
+    (header_len,) = _HEADER_LEN.unpack_from(mapped, len(magic))
+    start = len(magic) + _HEADER_LEN.size
+    header = json.loads(mapped[start:start + header_len].decode('utf-8'))
+    base = start + header_len
+
+    arrays = {}
+    for name, (offset, dtype, count) in header['sections'].items():
+        arrays[name] = np.frombuffer(mapped, dtype=np.dtype(dtype), count=count, offset=base + offset)
+    return header, arrays, mapped
+
+
+class StringColumn:
+    """Variable-length UTF-8 strings stored as an offset table plus a byte blob"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    @staticmethod
+    def encode(strings):
+        """Return (offsets, blob) arrays for a list of strings"""
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes().decode('utf-8')
@@ -0,0 +1,340 @@
+"""Nearest-neighbour index over consultation symptoms.
+
+Symptom text is turned into hashed word n-gram vectors (unigrams + bigrams,
+sublinear tf, L2 normalised) so no vocabulary has to be kept in sync between
+inserts. Vectors live in a CSR matrix stored as plain .npy files that are
+memory-mapped on load, plus an append-only delta log for rows inserted since
+the last compaction. A query is a single sparse mat-vec (cosine similarity)
+followed by an argpartition top-k.
+
+Several processes may share one index directory. Appends and compaction hold
+an exclusive flock on ``index.lock`` and loads a shared one, and each
+compaction generation gets its own delta file, so a reader never pairs a new
+base with the old generation's delta rows. Consultation ids only grow, so an
+append skips ids at or below the highest one already indexed; a row caught up
+at startup and then added by its own save is stored once.
+"""
+import os
+import re
+import json
+import fcntl
+import struct
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from scipy import sparse
+
+INDEX_DIR = 'consultation_index'
+N_FEATURES = 1 << 20
+COMPACT_AFTER = 5000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_RECORD_HEADER = struct.Struct('<qqi')
+
+
+def _ngrams(text):
+    tokens = _TOKEN_RE.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def vectorize(text):
+    """Return (indices, weights) of the hashed n-gram vector for text"""
+    counts = {}
+    for gram in _ngrams(text or ''):
+        bucket = zlib.crc32(gram.encode()) % N_FEATURES
+        counts[bucket] = counts.get(bucket, 0) + 1
+    if not counts:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+    weights = 1.0 + np.log(np.array([counts[i] for i in indices], dtype=np.float32))
+    weights /= np.linalg.norm(weights)
+    return indices, weights.astype(np.float32)
+
+
+class ConsultationIndex:
+    """Sparse cosine index over consultations.symptoms"""
+
+    def __init__(self, index_dir=INDEX_DIR, db_path='medical_app.db'):
+        self.index_dir = index_dir
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._generation = None
+        self._load()
+        self._catch_up()
+
+    # -- storage -------------------------------------------------------
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _delta_path(self, generation=None):
+        return self._path(f'delta-{self._generation if generation is None else generation}.bin')
+
+    @contextmanager
+    def _file_lock(self, exclusive=False):
+        """flock shared with other processes using the same index directory"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path('index.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        with self._file_lock():
+            self._load_locked()
+
+    def _load_locked(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        meta = {'generation': 0}
+        if os.path.exists(self._path('meta.json')):
+            with open(self._path('meta.json')) as f:
+                meta = json.load(f)
+
+        if meta['generation'] > 0:
+            data = np.load(self._path('data.npy'), mmap_mode='r')
+            indices = np.load(self._path('indices.npy'), mmap_mode='r')
+            indptr = np.load(self._path('indptr.npy'), mmap_mode='r')
+            self._base_ids = np.load(self._path('ids.npy'), mmap_mode='r')
+            self._base_users = np.load(self._path('user_ids.npy'), mmap_mode='r')
+            self._base = sparse.csr_matrix(
+                (data, indices, indptr), shape=(len(self._base_ids), N_FEATURES), copy=False
+            )
+        else:
+            self._base_ids = np.empty(0, dtype=np.int64)
+            self._base_users = np.empty(0, dtype=np.int64)
+            self._base = sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+
+        self._generation = meta['generation']
+        self._max_id = int(self._base_ids.max()) if len(self._base_ids) else 0
+        self._tail_ids, self._tail_users = [], []
+        self._tail_indices, self._tail_data = [], []
+        self._tail = None
+        self._delta_offset = 0
+        self._read_delta()
+
+    def _read_delta(self):
+        """Replay delta records appended since the last read (possibly by another process)"""
+        path = self._delta_path()
+        if not os.path.exists(path) or os.path.getsize(path) <= self._delta_offset:
+            return
+        with open(path, 'rb') as f:
+            f.seek(self._delta_offset)
+            buf = f.read()
+        pos = 0
+        while pos + _RECORD_HEADER.size <= len(buf):
+            cid, uid, nnz = _RECORD_HEADER.unpack_from(buf, pos)
+            end = pos + _RECORD_HEADER.size + nnz * 8
+            if end > len(buf):
+                break  # partially written record, pick it up next time
+            body = pos + _RECORD_HEADER.size
+            self._tail_ids.append(cid)
+            self._tail_users.append(uid)
+            self._max_id = max(self._max_id, cid)
+            self._tail_indices.append(np.frombuffer(buf, dtype=np.int32, count=nnz, offset=body))
+            self._tail_data.append(np.frombuffer(buf, dtype=np.float32, count=nnz, offset=body + nnz * 4))
+            pos = end
+        self._delta_offset += pos
+        self._tail = None
+
+    def _refresh(self):
+        """Pick up other processes' appends and compactions; caller holds the file lock"""
+        meta_path = self._path('meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                generation = json.load(f)['generation']
+            if generation != self._generation:
+                self._load_locked()  # new base and a fresh delta file, read from offset 0
+                return
+        self._read_delta()
+
+    def _tail_matrix(self):
+        if self._tail is None:
+            lengths = [len(ix) for ix in self._tail_indices]
+            indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.concatenate(self._tail_indices) if lengths else np.empty(0, dtype=np.int32)
+            data = np.concatenate(self._tail_data) if lengths else np.empty(0, dtype=np.float32)
+            self._tail = sparse.csr_matrix((data, indices, indptr), shape=(len(lengths), N_FEATURES))
+        return self._tail
+
+    def _catch_up(self):
+        """Index consultations saved before the index existed"""
+        last_id = self._max_id
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, user_id, symptoms FROM consultations WHERE id > ? ORDER BY id",
+                (last_id,)
+            )
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            rows = []  # consultations table not created yet
+        finally:
+            conn.close()
+        if rows:
+            self.add_many(rows)
+
+    def add(self, consultation_id, user_id, symptoms):
+        """Append one consultation to the index"""
+        self.add_many([(consultation_id, user_id, symptoms)])
+
+    def add_many(self, rows):
+        """Append (consultation_id, user_id, symptoms) rows in one delta write.
+
+        Rows whose id is at or below the highest id already indexed (by this
+        or another process) are skipped, so catch-up and saves never double up.
+        """
+        vectors = [(int(consultation_id), int(user_id or 0), vectorize(symptoms))
+                   for consultation_id, user_id, symptoms in rows]
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            records = []
+            last_id = self._max_id
+            for consultation_id, user_id, (indices, weights) in sorted(vectors, key=lambda v: v[0]):
+                if consultation_id <= last_id:
+                    continue
+                last_id = consultation_id
+                records.append(_RECORD_HEADER.pack(consultation_id, user_id, len(indices)))
+                records.append(indices.tobytes())
+                records.append(weights.tobytes())
+            if not records:
+                return
+            with open(self._delta_path(), 'ab') as f:
+                f.write(b''.join(records))
+            self._read_delta()
+            if len(self._tail_ids) >= COMPACT_AFTER:
+                self._compact_locked()
+
+    def compact(self):
+        """Merge the delta log into the memory-mapped base matrix"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """compact() body; caller holds the thread lock and the exclusive file lock"""
+        merged = sparse.vstack([self._base, self._tail_matrix()], format='csr')
+        ids = np.concatenate([self._base_ids, np.array(self._tail_ids, dtype=np.int64)])
+        users = np.concatenate([self._base_users, np.array(self._tail_users, dtype=np.int64)])
+        # Rows an older version indexed twice are merged away here
+        _, first = np.unique(ids, return_index=True)
+        if len(first) < len(ids):
+            keep = np.sort(first)
+            merged, ids, users = merged[keep], ids[keep], users[keep]
+        arrays = {
+            'data': merged.data.astype(np.float32),
+            'indices': merged.indices.astype(np.int32),
+            'indptr': merged.indptr.astype(np.int64),
+            'ids': ids,
+            'user_ids': users,
+        }
+        # Drop the mmaps before replacing the files underneath them
+        self._base = self._base_ids = self._base_users = None
+        for name, array in arrays.items():
+            tmp = self._path(f'{name}.tmp.npy')
+            np.save(tmp, array)
+            os.replace(tmp, self._path(f'{name}.npy'))
+        old_delta = self._delta_path()
+        with open(self._path('meta.json.tmp'), 'w') as f:
+            json.dump({'generation': self._generation + 1, 'rows': len(arrays['ids'])}, f)
+        os.replace(self._path('meta.json.tmp'), self._path('meta.json'))
+        for stale in (old_delta, self._path('delta.bin')):  # delta.bin: pre-generation layout
+            if os.path.exists(stale):
+                os.remove(stale)
+        self._load_locked()
+
+    def __len__(self):
+        return len(self._base_ids) + len(self._tail_ids)
+
+    # -- queries -------------------------------------------------------
+    def query(self, text, k=5, user_id=None, exclude_ids=(), min_score=0.05):
+        """Return [(consultation_id, user_id, score)] for the k most similar consultations.
+
+        Restricts to one user's history when user_id is given.
+        """
+        indices, weights = vectorize(text)
+        if not len(indices):
+            return []
+        # Sparse column vector: a query touches only its own few buckets
+        q = sparse.csc_matrix((weights, indices, [0, len(indices)]), shape=(N_FEATURES, 1))
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            scores = np.concatenate([(self._base @ q).toarray().ravel(), (self._tail_matrix() @ q).toarray().ravel()])
+            ids = np.concatenate([self._base_ids, np.array(self._tail_ids, dtype=np.int64)])
+            users = np.concatenate([self._base_users, np.array(self._tail_users, dtype=np.int64)])
+
+        if user_id is not None:
+            scores[users != user_id] = 0
+        if exclude_ids:
+            scores[np.isin(ids, list(exclude_ids))] = 0
+
+        if not len(scores) or k <= 0:
+            return []
+        # Widen the candidate set until k distinct ids are found (an index built
+        # before appends were deduplicated may hold a row twice until compaction)
+        n = min(k, len(scores))
+        while True:
+            top = np.argpartition(-scores, n - 1)[:n]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            results, seen = [], set()
+            for i in top:
+                if scores[i] < min_score or len(results) == k:
+                    break
+                if int(ids[i]) not in seen:
+                    seen.add(int(ids[i]))
+                    results.append((int(ids[i]), int(users[i]), float(scores[i])))
+            if len(results) == k or n == len(scores) or scores[top[-1]] < min_score:
+                return results
+            n = min(len(scores), n * 2)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_consultation_index():
+    """Process-wide index, built from the database on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ConsultationIndex()
+    return _index
+
+
+def find_similar_consultations(symptoms, user_id=None, exclude_id=None, k=5):
+    """Fetch the k most similar consultations as dicts, most similar first"""
+    exclude = (exclude_id,) if exclude_id is not None else ()
+    matches = get_consultation_index().query(symptoms, k=k, user_id=user_id, exclude_ids=exclude)
+    if not matches:
+        return []
+
+    conn = sqlite3.connect('medical_app.db')
+    cursor = conn.cursor()
+    placeholders = ','.join('?' * len(matches))
+    cursor.execute(
+        f"SELECT id, symptoms, diagnosis, severity, created_at FROM consultations WHERE id IN ({placeholders})",
+        [m[0] for m in matches]
+    )
+    rows = {row[0]: row for row in cursor.fetchall()}
+    conn.close()
+
+    results = []
+    for cid, _, score in matches:
+        if cid in rows:
+            _, symptoms_text, diagnosis, severity, created_at = rows[cid]
+            results.append({
+                'id': cid,
+                'score': score,
+                'symptoms': symptoms_text,
+                'diagnosis': diagnosis,
+                'severity': severity,
+                'date': str(created_at),
+            })
+    return results
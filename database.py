@@ -0,0 +1,987 @@
+"""SQLite storage helpers: schema, users, reminders, chat history and consultations"""
+import os
+import sys
+import sqlite3
+import hashlib
+import json
+import tempfile
+import functools
+from datetime import datetime, timedelta
+
+from metrics import REGISTRY
+from profiler import timed
+
+DB_QUERY_SECONDS = REGISTRY.histogram('aegis_db_query_seconds', 'Latency of database helpers', labels=('helper',))
+DB_CONNECT_SECONDS = REGISTRY.histogram('aegis_db_connect_seconds', 'Time spent waiting to open a database connection')
+
+def connect():
+    """Open the app database, recording how long the connection took"""
+    with DB_CONNECT_SECONDS.time():
+        return sqlite3.connect('medical_app.db')
+
+def db_helper(name, rows=False):
+    """Profile a helper per rerun and record its latency in aegis_db_query_seconds"""
+    def decorate(func):
+        profiled = timed(f'db.{name}', rows=rows)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with DB_QUERY_SECONDS.time(helper=name):
+                return profiled(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# Register adapters and converters for datetime to avoid DeprecationWarning in Python 3.12+
+def adapt_datetime(ts):
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+def convert_datetime(s):
+    return datetime.strptime(s.decode(), "%Y-%m-%d %H:%M:%S")
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_converter("timestamp", convert_datetime)
+
+# Save a new consultation for a user
+@db_helper('save_consultation')
+def save_consultation(user_id, symptoms, diagnosis, recommendations, severity):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO consultations (user_id, symptoms, diagnosis, recommendations, severity)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (user_id, symptoms, diagnosis, recommendations, severity))
+    consultation_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    # Keep the similar-consultations index in step with the table (numpy/scipy load on first save)
+    from consultation_index import get_consultation_index
+    get_consultation_index().add(consultation_id, user_id, symptoms)
+    return consultation_id
+
+# Retrieve all consultations for a user
+@db_helper('get_user_consultations', rows=True)
+def get_user_consultations(user_id, limit=None):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT * FROM consultations WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+    ''', (user_id, -1 if limit is None else limit))
+    consultations = cursor.fetchall()
+    conn.close()
+    return consultations
+
+RECENT_SEVERITY_LIMIT = 5  # consultations kept per user in consultation_recent
+SYMPTOM_KEYWORDS = ('headache', 'fever', 'pain', 'nausea', 'fatigue', 'cough')  # run rebuild-rollups after editing
+
+# Per-user consultation rollups, kept in step by triggers so the dashboard and
+# analytics read a few rows instead of the whole history
+_OCCURRENCES = "(length(lower({text})) - length(replace(lower({text}), keyword, ''))) / length(keyword)"
+ROLLUP_SCHEMA = f'''
+    CREATE INDEX IF NOT EXISTS idx_consultations_user ON consultations (user_id, created_at);
+
+    CREATE TABLE IF NOT EXISTS consultation_summary (
+        user_id INTEGER PRIMARY KEY,
+        total INTEGER NOT NULL,
+        first_at TIMESTAMP,
+        last_at TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS consultation_severity_counts (
+        user_id INTEGER NOT NULL,
+        severity TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, severity)
+    );
+    CREATE TABLE IF NOT EXISTS consultation_month_counts (
+        user_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, month)
+    );
+    CREATE TABLE IF NOT EXISTS consultation_day_counts (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day)
+    );
+    CREATE TABLE IF NOT EXISTS consultation_recent (
+        user_id INTEGER NOT NULL,
+        consultation_id INTEGER PRIMARY KEY,
+        severity TEXT,
+        created_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_consultation_recent_user ON consultation_recent (user_id, created_at);
+    CREATE TABLE IF NOT EXISTS symptom_keywords (keyword TEXT PRIMARY KEY);
+    CREATE TABLE IF NOT EXISTS consultation_keyword_counts (
+        user_id INTEGER NOT NULL,
+        keyword TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, keyword)
+    );
+
+    CREATE TRIGGER IF NOT EXISTS consultations_rollup_insert AFTER INSERT ON consultations
+    BEGIN
+        INSERT INTO consultation_summary (user_id, total, first_at, last_at)
+        VALUES (NEW.user_id, 1, NEW.created_at, NEW.created_at)
+        ON CONFLICT (user_id) DO UPDATE SET total = total + 1,
+            first_at = MIN(first_at, excluded.first_at), last_at = MAX(last_at, excluded.last_at);
+        INSERT INTO consultation_severity_counts (user_id, severity, count)
+        VALUES (NEW.user_id, IFNULL(NEW.severity, ''), 1)
+        ON CONFLICT (user_id, severity) DO UPDATE SET count = count + 1;
+        INSERT INTO consultation_month_counts (user_id, month, count)
+        VALUES (NEW.user_id, substr(NEW.created_at, 1, 7), 1)
+        ON CONFLICT (user_id, month) DO UPDATE SET count = count + 1;
+        INSERT INTO consultation_day_counts (user_id, day, count)
+        VALUES (NEW.user_id, substr(NEW.created_at, 1, 10), 1)
+        ON CONFLICT (user_id, day) DO UPDATE SET count = count + 1;
+        INSERT INTO consultation_keyword_counts (user_id, keyword, count)
+        SELECT NEW.user_id, keyword, {_OCCURRENCES.format(text='NEW.symptoms')}
+        FROM symptom_keywords WHERE instr(lower(NEW.symptoms), keyword) > 0
+        ON CONFLICT (user_id, keyword) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO consultation_recent (user_id, consultation_id, severity, created_at)
+        VALUES (NEW.user_id, NEW.id, NEW.severity, NEW.created_at);
+        DELETE FROM consultation_recent WHERE user_id = NEW.user_id AND consultation_id NOT IN (
+            SELECT consultation_id FROM consultation_recent WHERE user_id = NEW.user_id
+            ORDER BY created_at DESC, consultation_id DESC LIMIT {RECENT_SEVERITY_LIMIT});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS consultations_rollup_delete AFTER DELETE ON consultations
+    BEGIN
+        UPDATE consultation_summary SET total = total - 1,
+            first_at = (SELECT MIN(created_at) FROM consultations WHERE user_id = OLD.user_id),
+            last_at = (SELECT MAX(created_at) FROM consultations WHERE user_id = OLD.user_id)
+        WHERE user_id = OLD.user_id;
+        DELETE FROM consultation_summary WHERE user_id = OLD.user_id AND total <= 0;
+        UPDATE consultation_severity_counts SET count = count - 1
+        WHERE user_id = OLD.user_id AND severity = IFNULL(OLD.severity, '');
+        DELETE FROM consultation_severity_counts WHERE user_id = OLD.user_id AND count <= 0;
+        UPDATE consultation_month_counts SET count = count - 1
+        WHERE user_id = OLD.user_id AND month = substr(OLD.created_at, 1, 7);
+        DELETE FROM consultation_month_counts WHERE user_id = OLD.user_id AND count <= 0;
+        UPDATE consultation_day_counts SET count = count - 1
+        WHERE user_id = OLD.user_id AND day = substr(OLD.created_at, 1, 10);
+        DELETE FROM consultation_day_counts WHERE user_id = OLD.user_id AND count <= 0;
+        UPDATE consultation_keyword_counts SET count = count - {_OCCURRENCES.format(text='OLD.symptoms')}
+        WHERE user_id = OLD.user_id AND instr(lower(OLD.symptoms), keyword) > 0;
+        DELETE FROM consultation_keyword_counts WHERE user_id = OLD.user_id AND count <= 0;
+        -- Refill the recent list from the next newest consultations
+        DELETE FROM consultation_recent WHERE consultation_id = OLD.id;
+        INSERT INTO consultation_recent (user_id, consultation_id, severity, created_at)
+        SELECT user_id, id, severity, created_at FROM consultations
+        WHERE user_id = OLD.user_id
+          AND id NOT IN (SELECT consultation_id FROM consultation_recent WHERE user_id = OLD.user_id)
+        ORDER BY created_at DESC, id DESC
+        LIMIT (SELECT {RECENT_SEVERITY_LIMIT} - COUNT(*) FROM consultation_recent WHERE user_id = OLD.user_id);
+    END;
+'''
+
+MINUTES_PER_DAY = 24 * 60
+ON_TIME_MINUTES = 60  # a dose taken this close to its slot is on time
+_SLOT_MINUTE = "CAST(substr(slot.value, 1, 2) AS INTEGER) * 60 + CAST(substr(slot.value, 4, 2) AS INTEGER)"
+
+# Reminder time slots as rows (minute of day), so "what is due between 08:45 and
+# 09:15" is one index range across all users. time_slots JSON stays the written
+# column while callers migrate; triggers keep the rows in step with it (malformed
+# JSON just yields no slots)
+REMINDER_SLOTS_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS reminder_slots (
+        reminder_id INTEGER NOT NULL,
+        minute_of_day INTEGER NOT NULL,
+        PRIMARY KEY (reminder_id, minute_of_day),
+        FOREIGN KEY (reminder_id) REFERENCES medicine_reminders (id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_reminder_slots_minute ON reminder_slots (minute_of_day, reminder_id);
+
+    CREATE TRIGGER IF NOT EXISTS medicine_reminders_slots_insert
+    AFTER INSERT ON medicine_reminders
+    BEGIN
+        INSERT OR IGNORE INTO reminder_slots (reminder_id, minute_of_day)
+        SELECT NEW.id, {_SLOT_MINUTE} FROM json_each(iif(json_valid(NEW.time_slots), NEW.time_slots, NULL)) slot;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS medicine_reminders_slots_update
+    AFTER UPDATE OF time_slots ON medicine_reminders
+    BEGIN
+        DELETE FROM reminder_slots WHERE reminder_id = OLD.id;
+        INSERT OR IGNORE INTO reminder_slots (reminder_id, minute_of_day)
+        SELECT NEW.id, {_SLOT_MINUTE} FROM json_each(iif(json_valid(NEW.time_slots), NEW.time_slots, NULL)) slot;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS medicine_reminders_slots_delete
+    AFTER DELETE ON medicine_reminders
+    BEGIN
+        DELETE FROM reminder_slots WHERE reminder_id = OLD.id;
+    END;
+'''
+
+# Adds slot rows for reminders written before the table existed; safe to run again
+BACKFILL_REMINDER_SLOTS = f'''
+    INSERT OR IGNORE INTO reminder_slots (reminder_id, minute_of_day)
+    SELECT r.id, {_SLOT_MINUTE}
+    FROM medicine_reminders r, json_each(iif(json_valid(r.time_slots), r.time_slots, NULL)) slot
+'''
+
+OUTBOX_MAX_LATENESS_MINUTES = 15  # notifications created later than this past due stay in-app only
+
+# Outbound copies of notifications: one row per channel the user enabled,
+# queued by trigger when the notification is scheduled and drained by delivery.py
+OUTBOX_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS notification_preferences (
+        user_id INTEGER PRIMARY KEY,
+        email_enabled BOOLEAN NOT NULL DEFAULT FALSE,
+        push_enabled BOOLEAN NOT NULL DEFAULT FALSE,
+        updated_at TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        notification_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        recipient TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL,
+        last_error TEXT,
+        sent_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (notification_id, channel)
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox (channel, status, next_attempt_at);
+
+    CREATE TRIGGER IF NOT EXISTS notifications_outbox_insert AFTER INSERT ON notifications
+    WHEN NEW.scheduled_time >= datetime('now', 'localtime', '-{OUTBOX_MAX_LATENESS_MINUTES} minutes')
+    BEGIN
+        INSERT OR IGNORE INTO notification_outbox (notification_id, user_id, channel, recipient, next_attempt_at)
+        SELECT NEW.id, NEW.user_id, 'email', u.email, NEW.scheduled_time
+        FROM notification_preferences p JOIN users u ON u.id = p.user_id
+        WHERE p.user_id = NEW.user_id AND p.email_enabled
+        UNION ALL
+        SELECT NEW.id, NEW.user_id, 'webhook', NULL, NEW.scheduled_time
+        FROM notification_preferences p WHERE p.user_id = NEW.user_id AND p.push_enabled;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS notifications_outbox_delete AFTER DELETE ON notifications
+    BEGIN
+        DELETE FROM notification_outbox WHERE notification_id = OLD.id AND status IN ('pending', 'sending');
+    END;
+'''
+
+# Database setup with enhanced tables
+@db_helper('init_database')
+def init_database():
+    conn = connect()
+    cursor = conn.cursor()
+    # Takes effect only on a new database file; retention.py --convert switches an existing one
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets the Streamlit processes and the delivery worker read while one of them writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
+    # Users table with enhanced fields
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            age INTEGER,
+            height REAL,
+            weight REAL,
+            bmi REAL,
+            user_type TEXT DEFAULT 'patient',
+            medical_id TEXT,
+            specialization TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Consultations table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS consultations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            symptoms TEXT,
+            diagnosis TEXT,
+            recommendations TEXT,
+            severity TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    # Medicine reminders table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS medicine_reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            medicine_name TEXT NOT NULL,
+            dosage TEXT,
+            frequency TEXT,
+            time_slots TEXT,
+            start_date DATE,
+            end_date DATE,
+            active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_medicine_reminders_user ON medicine_reminders (user_id, active)"
+    )
+    
+    # Dose events: one append-only row per "Mark as Taken"
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dose_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            reminder_id INTEGER NOT NULL,
+            scheduled_at TIMESTAMP,
+            taken_at TIMESTAMP NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (reminder_id) REFERENCES medicine_reminders (id)
+        )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_dose_events_user ON dose_events (user_id, reminder_id, taken_at)"
+    )
+    
+    # Notifications table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            type TEXT,
+            message TEXT,
+            scheduled_time TIMESTAMP,
+            sent BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    # Inbox state for delivered notifications (added after the table shipped)
+    cursor.execute("PRAGMA table_info(notifications)")
+    notification_columns = {row[1] for row in cursor.fetchall()}
+    for column in ('read_at', 'dismissed_at'):
+        if column not in notification_columns:
+            cursor.execute(f"ALTER TABLE notifications ADD COLUMN {column} TIMESTAMP")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications (user_id, sent, scheduled_time)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_type ON notifications (user_id, type, scheduled_time)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_scheduled ON notifications (scheduled_time)"
+    )
+    
+    # Chat messages table (one row per question/answer turn)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            question TEXT,
+            answer TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_user ON chat_messages (user_id, id)"
+    )
+    conn.commit()
+
+    # Rollup tables; a database that predates them gets backfilled once
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'consultation_summary'")
+    needs_backfill = cursor.fetchone() is None
+    conn.executescript(ROLLUP_SCHEMA)
+    cursor.executemany("INSERT OR IGNORE INTO symptom_keywords (keyword) VALUES (?)",
+                       [(keyword,) for keyword in SYMPTOM_KEYWORDS])
+    conn.executescript(OUTBOX_SCHEMA)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reminder_slots'")
+    slots_need_backfill = cursor.fetchone() is None
+    conn.executescript(REMINDER_SLOTS_SCHEMA)
+    if slots_need_backfill:
+        cursor.execute(BACKFILL_REMINDER_SLOTS)
+    conn.commit()
+    conn.close()
+    if needs_backfill:
+        rebuild_rollups()
+
+@db_helper('rebuild_rollups')
+def rebuild_rollups():
+    """Recompute every consultation rollup from the consultations table"""
+    conn = connect()
+    conn.executescript(f'''
+        BEGIN;
+        DELETE FROM consultation_summary;
+        DELETE FROM consultation_severity_counts;
+        DELETE FROM consultation_month_counts;
+        DELETE FROM consultation_day_counts;
+        DELETE FROM consultation_keyword_counts;
+        DELETE FROM consultation_recent;
+        INSERT INTO consultation_summary (user_id, total, first_at, last_at)
+        SELECT user_id, COUNT(*), MIN(created_at), MAX(created_at) FROM consultations GROUP BY user_id;
+        INSERT INTO consultation_severity_counts (user_id, severity, count)
+        SELECT user_id, IFNULL(severity, ''), COUNT(*) FROM consultations GROUP BY user_id, IFNULL(severity, '');
+        INSERT INTO consultation_month_counts (user_id, month, count)
+        SELECT user_id, substr(created_at, 1, 7), COUNT(*) FROM consultations GROUP BY 1, 2;
+        INSERT INTO consultation_day_counts (user_id, day, count)
+        SELECT user_id, substr(created_at, 1, 10), COUNT(*) FROM consultations GROUP BY 1, 2;
+        INSERT INTO consultation_keyword_counts (user_id, keyword, count)
+        SELECT c.user_id, k.keyword, SUM({_OCCURRENCES.format(text='c.symptoms')})
+        FROM consultations c JOIN symptom_keywords k ON instr(lower(c.symptoms), k.keyword) > 0
+        GROUP BY c.user_id, k.keyword;
+        INSERT INTO consultation_recent (user_id, consultation_id, severity, created_at)
+        SELECT user_id, id, severity, created_at FROM (
+            SELECT user_id, id, severity, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at DESC, id DESC) AS position
+            FROM consultations
+        ) WHERE position <= {RECENT_SEVERITY_LIMIT};
+        COMMIT;
+    ''')
+    conn.close()
+
+@db_helper('get_health_rollup')
+def get_health_rollup(user_id, recent_days=30):
+    """Consultation aggregates for one user, read from the rollup tables"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT total, first_at, last_at FROM consultation_summary WHERE user_id = ?", (user_id,))
+    total, first_at, last_at = cursor.fetchone() or (0, None, None)
+    cursor.execute("SELECT severity, count FROM consultation_severity_counts WHERE user_id = ?", (user_id,))
+    severity = dict(cursor.fetchall())
+    cursor.execute("SELECT month, count FROM consultation_month_counts WHERE user_id = ? ORDER BY month", (user_id,))
+    months = cursor.fetchall()
+    since = (datetime.now() - timedelta(days=recent_days)).strftime('%Y-%m-%d')
+    cursor.execute("SELECT day, count FROM consultation_day_counts WHERE user_id = ? AND day >= ?", (user_id, since))
+    days = dict(cursor.fetchall())
+    cursor.execute(
+        "SELECT severity FROM consultation_recent WHERE user_id = ? ORDER BY created_at DESC, consultation_id DESC",
+        (user_id,)
+    )
+    recent_severity = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT keyword, count FROM consultation_keyword_counts WHERE user_id = ?", (user_id,))
+    keywords = dict(cursor.fetchall())
+    conn.close()
+    return {
+        'total': total, 'first_at': first_at, 'last_at': last_at, 'severity': severity, 'months': months,
+        'days': days, 'recent_severity': recent_severity, 'keywords': keywords,
+    }
+
+def consultations_since(rollup, days):
+    """Consultations in the last `days` days, from a rollup's day counts"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    return sum(count for day, count in rollup['days'].items() if day >= since)
+
+# Enhanced authentication functions
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def verify_password(password, hashed):
+    return hash_password(password) == hashed
+
+@db_helper('create_user')
+def create_user(username, email, password, age=None, height=None, weight=None, bmi=None, 
+               user_type='patient', medical_id=None, specialization=None):
+    conn = connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """INSERT INTO users (username, email, password_hash, age, height, weight, bmi, 
+               user_type, medical_id, specialization) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (username, email, hash_password(password), age, height, weight, bmi, 
+             user_type, medical_id, specialization)
+        )
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+@db_helper('authenticate_user')
+def authenticate_user(username, password):
+    conn = connect()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT id, username, email, password_hash, user_type, medical_id, specialization FROM users WHERE username = ?",
+        (username,)
+    )
+    user = cursor.fetchone()
+    conn.close()
+    
+    if user and verify_password(password, user[3]):
+        return {
+            "id": user[0], 
+            "username": user[1], 
+            "email": user[2], 
+            "user_type": user[4],
+            "medical_id": user[5],
+            "specialization": user[6]
+        }
+    return None
+
+# Medicine reminder functions
+def slot_label(minute_of_day):
+    """Minute of day -> 'HH:MM'"""
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+@db_helper('add_medicine_reminder')
+def add_medicine_reminder(user_id, medicine_name, dosage, frequency, time_slots, start_date, end_date):
+    conn = connect()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """INSERT INTO medicine_reminders (user_id, medicine_name, dosage, frequency, 
+           time_slots, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        (user_id, medicine_name, dosage, frequency, json.dumps(time_slots), start_date, end_date)
+    )
+    conn.commit()
+    conn.close()
+
+@db_helper('backfill_reminder_slots')
+def backfill_reminder_slots():
+    """Add slot rows for reminders written without them; returns rows added"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(BACKFILL_REMINDER_SLOTS)
+    added = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return added
+
+@db_helper('get_user_reminder_slots')
+def get_user_reminder_slots(user_id):
+    """{reminder_id: [minute of day, ...]} for a user's active reminders, slots in time order"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT s.reminder_id, s.minute_of_day FROM medicine_reminders r
+           JOIN reminder_slots s ON s.reminder_id = r.id
+           WHERE r.user_id = ? AND r.active = TRUE ORDER BY s.reminder_id, s.minute_of_day""",
+        (user_id,)
+    )
+    slots = {}
+    for reminder_id, minute_of_day in cursor.fetchall():
+        slots.setdefault(reminder_id, []).append(minute_of_day)
+    conn.close()
+    return slots
+
+@db_helper('get_due_reminder_slots', rows=True)
+def get_due_reminder_slots(start, end, user_id=None):
+    """Doses of active reminders due in [start, end) across all users (or one), in due order.
+
+    Returns (due_at, reminder_id, user_id, medicine_name, dosage) tuples. The
+    window may cross midnight but must be at most a day long; each calendar
+    day it touches is one range on idx_reminder_slots_minute.
+    """
+    if end - start > timedelta(days=1):
+        raise ValueError("due window must be at most one day long")
+    ranges = []
+    day = datetime.combine(start.date(), datetime.min.time())
+    while day < end:
+        low = max(0, int((start - day).total_seconds() // 60))
+        high = min(MINUTES_PER_DAY, int(-(-(end - day).total_seconds() // 60)))
+        if low < high:
+            ranges.append((day, low, high))
+        day += timedelta(days=1)
+    if not ranges:
+        return []
+    part = """SELECT ? AS day, s.minute_of_day, r.id, r.user_id, r.medicine_name, r.dosage
+              FROM reminder_slots s JOIN medicine_reminders r ON r.id = s.reminder_id
+              WHERE s.minute_of_day >= ? AND s.minute_of_day < ? AND r.active = TRUE
+                AND r.start_date <= ? AND (r.end_date IS NULL OR r.end_date >= ?)
+                AND (? IS NULL OR r.user_id = ?)"""
+    params = []
+    for day, low, high in ranges:
+        date = day.strftime('%Y-%m-%d')
+        params += [date, low, high, date, date, user_id, user_id]
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(" UNION ALL ".join([part] * len(ranges)) + " ORDER BY day, minute_of_day, id", params)
+    due = [(datetime.strptime(day, '%Y-%m-%d') + timedelta(minutes=minute_of_day),
+            reminder_id, owner_id, medicine_name, dosage)
+           for day, minute_of_day, reminder_id, owner_id, medicine_name, dosage in cursor.fetchall()]
+    conn.close()
+    # Minutes are whole; drop the part of the first/last minute outside the window
+    return [row for row in due if start <= row[0] < end]
+
+@db_helper('deactivate_reminder')
+def deactivate_reminder(user_id, reminder_id):
+    """Stop a user's reminder; its slots and dose history stay for the adherence figures"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE medicine_reminders SET active = FALSE WHERE id = ? AND user_id = ?",
+        (reminder_id, user_id)
+    )
+    conn.commit()
+    conn.close()
+
+@db_helper('get_user_reminders', rows=True)
+def get_user_reminders(user_id):
+    conn = connect()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT * FROM medicine_reminders WHERE user_id = ? AND active = TRUE ORDER BY created_at DESC",
+        (user_id,)
+    )
+    reminders = cursor.fetchall()
+    conn.close()
+    
+    return reminders
+
+@db_helper('record_dose')
+def record_dose(user_id, reminder_id, scheduled_at, taken_at=None):
+    """Log that the dose of a reminder scheduled at scheduled_at was taken"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO dose_events (user_id, reminder_id, scheduled_at, taken_at) VALUES (?, ?, ?, ?)",
+        (user_id, reminder_id, scheduled_at, taken_at or datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+@db_helper('get_dose_events', rows=True)
+def get_dose_events(user_id):
+    """[(reminder_id, scheduled minute, taken minute)] for a user, minutes counted from the epoch"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT reminder_id, CAST(strftime('%s', scheduled_at) AS INTEGER) / 60,
+                  CAST(strftime('%s', taken_at) AS INTEGER) / 60
+           FROM dose_events WHERE user_id = ? AND scheduled_at IS NOT NULL
+           ORDER BY reminder_id, taken_at""",
+        (user_id,)
+    )
+    events = cursor.fetchall()
+    conn.close()
+    return events
+
+@db_helper('create_water_reminder')
+def create_water_reminder(user_id, frequency_hours=2):
+    """Schedule today's water reminders, writing only the slots that change"""
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    # Every frequency_hours from 8 AM to 10 PM
+    slots = [today + timedelta(hours=hour) for hour in range(8, 23, frequency_hours)]
+    conn = connect()
+    cursor = conn.cursor()
+    
+    # Undelivered slots the new frequency dropped; delivered ones stay in the inbox
+    cursor.execute(
+        f"""DELETE FROM notifications WHERE user_id = ? AND type = 'water' AND sent = FALSE
+            AND scheduled_time >= ? AND scheduled_time < ? AND scheduled_time NOT IN ({', '.join('?' * len(slots))})""",
+        [user_id, today, today + timedelta(days=1)] + slots
+    )
+    cursor.executemany(
+        """INSERT INTO notifications (user_id, type, message, scheduled_time)
+           SELECT ?, 'water', ?, ? WHERE NOT EXISTS (
+               SELECT 1 FROM notifications WHERE user_id = ? AND type = 'water' AND scheduled_time = ?)""",
+        [(user_id, '💧 Time to drink water! Stay hydrated for better health.', slot, user_id, slot) for slot in slots]
+    )
+    
+    conn.commit()
+    conn.close()
+
+# Notification inbox functions
+NOTIFICATION_WINDOW = 10  # delivered notifications kept in session memory
+NOTIFICATION_PAGE_SIZE = 10  # inbox rows fetched per page
+
+def _notification_dict(row):
+    notification_id, notification_type, message, scheduled_time, read_at = row
+    return {'id': notification_id, 'type': notification_type, 'message': message,
+            'time': scheduled_time, 'read': read_at is not None}
+
+@db_helper('deliver_due_notifications', rows=True)
+def deliver_due_notifications(user_id, now=None):
+    """Mark notifications that are due as sent and return them, oldest first"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT id, type, message, scheduled_time, read_at FROM notifications
+           WHERE user_id = ? AND sent = FALSE AND scheduled_time <= ?
+           ORDER BY scheduled_time, id""",
+        (user_id, now or datetime.now())
+    )
+    notifications = [_notification_dict(row) for row in cursor.fetchall()]
+    cursor.executemany("UPDATE notifications SET sent = TRUE WHERE id = ?", [(n['id'],) for n in notifications])
+    conn.commit()
+    conn.close()
+    return notifications
+
+@db_helper('get_notifications', rows=True)
+def get_notifications(user_id, notification_type=None, unread_only=False, limit=NOTIFICATION_PAGE_SIZE, offset=0):
+    """One page of the delivered, undismissed inbox, newest first"""
+    conditions = ["user_id = ?", "sent = TRUE", "dismissed_at IS NULL"]
+    params = [user_id]
+    if notification_type is not None:
+        conditions.append("type = ?")
+        params.append(notification_type)
+    if unread_only:
+        conditions.append("read_at IS NULL")
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT id, type, message, scheduled_time, read_at FROM notifications
+            WHERE {' AND '.join(conditions)}
+            ORDER BY scheduled_time DESC, id DESC LIMIT ? OFFSET ?""",
+        params + [limit, offset]
+    )
+    notifications = [_notification_dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return notifications
+
+@db_helper('get_notification_counts')
+def get_notification_counts(user_id):
+    """{type: (total, unread)} over the delivered, undismissed inbox"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT type, COUNT(*), COUNT(*) - COUNT(read_at) FROM notifications
+           WHERE user_id = ? AND sent = TRUE AND dismissed_at IS NULL
+           GROUP BY type ORDER BY type""",
+        (user_id,)
+    )
+    counts = {notification_type: (total, unread) for notification_type, total, unread in cursor.fetchall()}
+    conn.close()
+    return counts
+
+def _set_notification_state(column, user_id, notification_ids):
+    conn = connect()
+    cursor = conn.cursor()
+    query = f"UPDATE notifications SET {column} = ? WHERE user_id = ? AND sent = TRUE AND {column} IS NULL"
+    if notification_ids is None:
+        cursor.execute(query, (datetime.now(), user_id))
+    else:
+        cursor.executemany(f"{query} AND id = ?", [(datetime.now(), user_id, i) for i in notification_ids])
+    conn.commit()
+    conn.close()
+
+@db_helper('mark_notifications_read')
+def mark_notifications_read(user_id, notification_ids=None):
+    """Mark the given delivered notifications (or all of them) as read"""
+    _set_notification_state('read_at', user_id, notification_ids)
+
+@db_helper('dismiss_notifications')
+def dismiss_notifications(user_id, notification_ids=None):
+    """Remove the given delivered notifications (or all of them) from the inbox"""
+    _set_notification_state('dismissed_at', user_id, notification_ids)
+
+# Delivery outbox functions (email and webhook copies of notifications)
+@db_helper('get_notification_preferences')
+def get_notification_preferences(user_id):
+    """{'email': bool, 'push': bool}; both off until the user saves settings"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT email_enabled, push_enabled FROM notification_preferences WHERE user_id = ?", (user_id,)
+    )
+    row = cursor.fetchone() or (False, False)
+    conn.close()
+    return {'email': bool(row[0]), 'push': bool(row[1])}
+
+@db_helper('save_notification_preferences')
+def save_notification_preferences(user_id, email, push):
+    """Store the delivery channels and bring queued deliveries in line with them"""
+    now = datetime.now()
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """INSERT INTO notification_preferences (user_id, email_enabled, push_enabled, updated_at)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT (user_id) DO UPDATE SET email_enabled = excluded.email_enabled,
+               push_enabled = excluded.push_enabled, updated_at = excluded.updated_at""",
+        (user_id, bool(email), bool(push), now)
+    )
+    for channel, enabled in (('email', email), ('webhook', push)):
+        if enabled:
+            # Notifications already scheduled pick up the newly enabled channel
+            recipient = 'u.email' if channel == 'email' else 'NULL'
+            cursor.execute(
+                f"""INSERT OR IGNORE INTO notification_outbox
+                        (notification_id, user_id, channel, recipient, next_attempt_at)
+                    SELECT n.id, n.user_id, ?, {recipient}, n.scheduled_time
+                    FROM notifications n JOIN users u ON u.id = n.user_id
+                    WHERE n.user_id = ? AND n.scheduled_time >= ?""",
+                (channel, user_id, now - timedelta(minutes=OUTBOX_MAX_LATENESS_MINUTES))
+            )
+        else:
+            cursor.execute(
+                "DELETE FROM notification_outbox WHERE user_id = ? AND channel = ? AND status = 'pending'",
+                (user_id, channel)
+            )
+    conn.commit()
+    conn.close()
+
+@db_helper('claim_deliveries', rows=True)
+def claim_deliveries(channel, limit, lease_seconds, now=None):
+    """Lease up to limit due outbox rows of a channel to the caller, oldest first.
+
+    Rows stay 'sending' until finish_deliveries; rows whose lease ran out
+    (their worker died) are due again.
+    """
+    now = now or datetime.now()
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")  # one claimer at a time, so no row goes to two workers
+    rows = []
+    # Expired leases first, then fresh rows; one status per query keeps the index order (no sort)
+    for status in ('sending', 'pending'):
+        cursor.execute(
+            """SELECT o.id, o.user_id, o.recipient, o.attempts, n.type, n.message, n.scheduled_time
+               FROM notification_outbox o JOIN notifications n ON n.id = o.notification_id
+               WHERE o.channel = ? AND o.status = ? AND o.next_attempt_at <= ?
+               ORDER BY o.next_attempt_at LIMIT ?""",
+            (channel, status, now, limit - len(rows))
+        )
+        rows.extend({'id': row_id, 'user_id': user_id, 'recipient': recipient, 'attempts': attempts + 1,
+                     'type': notification_type, 'message': message, 'scheduled_time': scheduled_time}
+                    for row_id, user_id, recipient, attempts, notification_type, message, scheduled_time
+                    in cursor.fetchall())
+        if len(rows) >= limit:
+            break
+    cursor.executemany(
+        """UPDATE notification_outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?
+           WHERE id = ?""",
+        [(now + timedelta(seconds=lease_seconds), row['id']) for row in rows]
+    )
+    conn.commit()
+    conn.close()
+    return rows
+
+@db_helper('finish_deliveries')
+def finish_deliveries(sent_ids=(), retries=(), dead=(), now=None):
+    """Record a batch's outcomes: sent ids, (id, next_attempt_at, error) retries and (id, error) dead letters"""
+    now = now or datetime.now()
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE notification_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+        [(now, row_id) for row_id in sent_ids]
+    )
+    cursor.executemany(
+        "UPDATE notification_outbox SET status = 'pending', next_attempt_at = ?, last_error = ? WHERE id = ?",
+        [(next_attempt_at, error, row_id) for row_id, next_attempt_at, error in retries]
+    )
+    cursor.executemany(
+        "UPDATE notification_outbox SET status = 'dead', last_error = ? WHERE id = ?",
+        [(error, row_id) for row_id, error in dead]
+    )
+    conn.commit()
+    conn.close()
+
+@db_helper('get_outbox_counts')
+def get_outbox_counts():
+    """{(channel, status): rows} over the whole outbox"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT channel, status, COUNT(*) FROM notification_outbox GROUP BY channel, status")
+    counts = {(channel, status): count for channel, status, count in cursor.fetchall()}
+    conn.close()
+    return counts
+
+@db_helper('requeue_dead_deliveries')
+def requeue_dead_deliveries(channel=None):
+    """Give dead-lettered rows (of one channel, or all) a fresh set of attempts; returns how many"""
+    conn = connect()
+    cursor = conn.cursor()
+    query = "UPDATE notification_outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+    if channel is None:
+        cursor.execute(query, (datetime.now(),))
+    else:
+        cursor.execute(f"{query} AND channel = ?", (datetime.now(), channel))
+    requeued = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return requeued
+
+# Chat history functions
+CHAT_WINDOW = 20  # turns kept in session memory
+CHAT_PAGE_SIZE = 20  # turns fetched per "load earlier" click
+
+@db_helper('save_chat_message')
+def save_chat_message(user_id, question, answer):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO chat_messages (user_id, question, answer) VALUES (?, ?, ?)",
+        (user_id, question, answer)
+    )
+    message_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return message_id
+
+@db_helper('get_chat_messages', rows=True)
+def get_chat_messages(user_id, before_id=None, limit=CHAT_WINDOW):
+    """Return up to `limit` (id, question, answer) turns older than before_id, oldest first"""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT id, question, answer FROM chat_messages
+           WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?""",
+        (user_id, before_id if before_id is not None else 2 ** 63 - 1, limit)
+    )
+    messages = cursor.fetchall()
+    conn.close()
+    messages.reverse()
+    return messages
+
+@db_helper('clear_chat_messages')
+def clear_chat_messages(user_id):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+    conn.commit()
+    conn.close()
+
+@db_helper('export_chat_messages')
+def export_chat_messages(user_id, username, batch_size=500):
+    """Write the full chat history as JSON to a temp file, one DB batch at a time.
+
+    Returns the file opened for reading (an io.BufferedReader, which
+    st.download_button accepts). Streamlit still reads it into memory once
+    to serve the download; the export itself never holds the history.
+    """
+    fd, path = tempfile.mkstemp(prefix='aegis-chat-', suffix='.json')
+    export = os.fdopen(fd, 'wb')
+    export.write(json.dumps({'user': username, 'timestamp': datetime.now().isoformat()})[:-1].encode())
+    export.write(b', "chat_history": [')
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT question, answer, created_at FROM chat_messages WHERE user_id = ? ORDER BY id",
+        (user_id,)
+    )
+    first = True
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for question, answer, created_at in rows:
+            if not first:
+                export.write(b',')
+            first = False
+            export.write(json.dumps({'question': question, 'answer': answer, 'time': str(created_at)}).encode())
+    conn.close()
+
+    export.write(b']}')
+    export.close()
+    export = open(path, 'rb')
+    os.remove(path)  # the open handle keeps the data until it is closed
+    return export
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['rebuild-rollups']:
+        init_database()
+        rebuild_rollups()
+        print("Rebuilt consultation rollups")
+    elif sys.argv[1:] == ['backfill-reminder-slots']:
+        init_database()
+        print(f"Added {backfill_reminder_slots()} reminder slot rows")
+    else:
+        print("usage: python database.py rebuild-rollups | backfill-reminder-slots")
@@ -0,0 +1,317 @@
+"""Email and webhook delivery of notifications from the outbox.
+
+When a notification is scheduled, a trigger queues one ``notification_outbox``
+row per channel the user enabled, due at the notification's time.
+``DeliveryWorker`` drains the outbox on an asyncio loop. Each channel claims
+due rows in batches under a lease and keeps at most ``concurrency`` batches
+in flight, each sent over one connection: an SMTP session for email, a
+pooled HTTP connection for webhooks. Transient failures are retried with
+exponential backoff and jitter; permanent failures (5xx SMTP replies, 4xx
+HTTP statuses) and rows out of attempts are dead-lettered. A worker that
+dies mid-batch leaves its rows leased, and they become due again when the
+lease runs out, so delivery is at least once (webhooks carry the outbox id
+as an ``Idempotency-Key``).
+
+    python delivery.py run             # work until interrupted
+    python delivery.py status          # outbox rows by channel and status
+    python delivery.py requeue-dead    # retry dead letters from scratch
+
+Configured with environment variables:
+
+    AEGIS_SMTP_HOST, AEGIS_SMTP_PORT    SMTP relay (default localhost:8025)
+    AEGIS_SMTP_SENDER                   From address of reminder emails
+    AEGIS_WEBHOOK_URL                   push endpoint; webhooks stay queued while unset
+    AEGIS_DELIVERY_EMAIL_CONCURRENCY    SMTP sessions in flight (default 4)
+    AEGIS_DELIVERY_WEBHOOK_CONCURRENCY  HTTP requests in flight (default 16)
+    AEGIS_DELIVERY_BATCH                rows claimed per batch (default 50)
+    AEGIS_DELIVERY_MAX_ATTEMPTS         attempts before dead-lettering (default 6)
+
+``delivery_sink.py`` runs local SMTP and HTTP sinks for offline tests.
+"""
+import os
+import sys
+import random
+import asyncio
+import smtplib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from database import claim_deliveries, finish_deliveries, get_outbox_counts, init_database, requeue_dead_deliveries
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SMTP_PORT = 8025
+DEFAULT_SENDER = 'reminders@aegis-health.local'
+BATCH_SIZE = 50
+LEASE_SECONDS = 300  # a batch not finished by then is claimed again
+POLL_SECONDS = 1.0
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_CAP_SECONDS = 3600
+
+DELIVERIES = REGISTRY.counter('aegis_deliveries_total', 'Outbox send attempts by channel and outcome',
+                              labels=('channel', 'outcome'))
+DELIVERY_BATCH_SECONDS = REGISTRY.histogram('aegis_delivery_batch_seconds', 'Time to send one claimed batch',
+                                            labels=('channel',))
+DELIVERY_LAG_SECONDS = REGISTRY.histogram('aegis_delivery_lag_seconds', 'Scheduled time to successful send',
+                                          labels=('channel',), buckets=(1, 5, 15, 60, 300, 900, 3600, 14400, 86400))
+
+
+def backoff_seconds(attempts, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS):
+    """Delay before the next try after `attempts` failures: doubling, capped, jittered"""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class EmailChannel:
+    """Sends each batch as one SMTP session, from a worker thread (smtplib blocks)"""
+
+    name = 'email'
+
+    def __init__(self, host='localhost', port=DEFAULT_SMTP_PORT, sender=DEFAULT_SENDER, concurrency=4, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _message(self, row):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = row['recipient']
+        message['Subject'] = f"Aegis Health: {row['type']} reminder"
+        message.set_content(f"{row['message']}\n\nScheduled for {row['scheduled_time']}.\n")
+        return message
+
+    def _send_batch(self, rows):
+        """[(row, None | (error, permanent))] for one SMTP session"""
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except (OSError, smtplib.SMTPException) as exc:
+            return [(row, (f'connect: {exc}', False)) for row in rows]
+        results = []
+        with smtp:
+            for i, row in enumerate(rows):
+                try:
+                    smtp.send_message(self._message(row))
+                except smtplib.SMTPRecipientsRefused as exc:
+                    codes = [code for code, _ in exc.recipients.values()]
+                    results.append((row, (f'refused: {codes}', all(code >= 500 for code in codes))))
+                except smtplib.SMTPResponseException as exc:
+                    results.append((row, (f'{exc.smtp_code} {exc.smtp_error!r}', exc.smtp_code >= 500)))
+                except (OSError, smtplib.SMTPException) as exc:
+                    # The session is gone; the rest of the batch goes back for a retry
+                    results.extend((r, (f'session: {exc}', False)) for r in rows[i:])
+                    break
+                else:
+                    results.append((row, None))
+        return results
+
+    async def send(self, rows, executor):
+        return await asyncio.get_running_loop().run_in_executor(executor, self._send_batch, rows)
+
+
+class WebhookChannel:
+    """POSTs each row as JSON through one pooled async HTTP client"""
+
+    name = 'webhook'
+
+    def __init__(self, url, concurrency=16, timeout=10.0):
+        self.url = url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._client = None
+
+    async def open(self):
+        import httpx  # optional dependency, only needed for webhooks
+
+        self._httpx = httpx
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def send(self, rows, executor):
+        results = []
+        for row in rows:
+            payload = {'id': row['id'], 'user_id': row['user_id'], 'type': row['type'],
+                       'message': row['message'], 'scheduled_time': str(row['scheduled_time'])}
+            try:
+                response = await self._client.post(self.url, json=payload,
+                                                   headers={'Idempotency-Key': str(row['id'])})
+            except self._httpx.HTTPError as exc:
+                results.append((row, (f'{exc.__class__.__name__}: {exc}', False)))
+                continue
+            status = response.status_code
+            if status < 300:
+                results.append((row, None))
+            else:
+                # 408 and 429 are worth retrying; any other 4xx will fail the same way again
+                results.append((row, (f'HTTP {status}', 400 <= status < 500 and status not in (408, 429))))
+        return results
+
+
+class DeliveryWorker:
+    """Drains the outbox for a set of channels until stop() is called"""
+
+    def __init__(self, channels, batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS, poll_seconds=POLL_SECONDS,
+                 max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE_SECONDS, backoff_cap=BACKOFF_CAP_SECONDS):
+        self.channels = channels
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats = {'sent': 0, 'retry': 0, 'dead': 0}
+        self._stopping = None
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        self._stopping = asyncio.Event()
+        # Blocking work (SQLite, SMTP sessions) gets its own threads so the default pool can't starve it
+        workers = sum(channel.concurrency for channel in self.channels if channel.name == 'email') + len(self.channels) + 1
+        with ThreadPoolExecutor(workers, thread_name_prefix='delivery') as executor:
+            for channel in self.channels:
+                await channel.open()
+            try:
+                await asyncio.gather(*[self._dispatch(channel, executor) for channel in self.channels])
+            finally:
+                for channel in self.channels:
+                    await channel.close()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self, channel, executor):
+        """Claim batches while a slot is free; each batch sends on its own task"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(channel.concurrency)
+        in_flight = set()
+
+        def done(task):
+            in_flight.discard(task)
+            slots.release()
+
+        while not self._stopping.is_set():
+            await slots.acquire()
+            try:
+                rows = await loop.run_in_executor(executor, claim_deliveries, channel.name,
+                                                  self.batch_size, self.lease_seconds)
+            except Exception:
+                logger.exception("Claiming %s deliveries failed", channel.name)
+                rows = []
+            if not rows:
+                slots.release()
+                await self._idle()
+                continue
+            task = loop.create_task(self._deliver(channel, rows, executor))
+            in_flight.add(task)
+            task.add_done_callback(done)
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _deliver(self, channel, rows, executor):
+        with DELIVERY_BATCH_SECONDS.time(channel=channel.name):
+            try:
+                results = await channel.send(rows, executor)
+            except Exception as exc:
+                logger.exception("Sending %d %s deliveries failed", len(rows), channel.name)
+                results = [(row, (f'{exc.__class__.__name__}: {exc}', False)) for row in rows]
+
+        now = datetime.now()
+        sent, retries, dead = [], [], []
+        for row, failure in results:
+            if failure is None:
+                sent.append(row['id'])
+                DELIVERY_LAG_SECONDS.observe(max(0.0, (now - _as_datetime(row['scheduled_time'])).total_seconds()),
+                                             channel=channel.name)
+                continue
+            error, permanent = failure
+            if permanent or row['attempts'] >= self.max_attempts:
+                dead.append((row['id'], error))
+            else:
+                delay = backoff_seconds(row['attempts'], self.backoff_base, self.backoff_cap)
+                retries.append((row['id'], now + timedelta(seconds=delay), error))
+        for outcome, items in (('sent', sent), ('retry', retries), ('dead', dead)):
+            if items:
+                self.stats[outcome] += len(items)
+                DELIVERIES.inc(len(items), channel=channel.name, outcome=outcome)
+        if dead:
+            logger.warning("Dead-lettered %d %s deliveries, last error: %s", len(dead), channel.name, dead[-1][1])
+        try:
+            await asyncio.get_running_loop().run_in_executor(executor, finish_deliveries, sent, retries, dead, now)
+        except Exception:
+            # The rows stay leased and are sent again once the lease runs out
+            logger.exception("Recording %d %s delivery outcomes failed", len(rows), channel.name)
+
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime) else datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S")
+
+
+def create_worker_from_env():
+    """DeliveryWorker for the channels configured in the environment"""
+    env = os.environ
+    channels = [EmailChannel(
+        env.get('AEGIS_SMTP_HOST', 'localhost'),
+        int(env.get('AEGIS_SMTP_PORT', DEFAULT_SMTP_PORT)),
+        env.get('AEGIS_SMTP_SENDER', DEFAULT_SENDER),
+        concurrency=int(env.get('AEGIS_DELIVERY_EMAIL_CONCURRENCY', '4')),
+    )]
+    if env.get('AEGIS_WEBHOOK_URL'):
+        channels.append(WebhookChannel(env['AEGIS_WEBHOOK_URL'],
+                                       concurrency=int(env.get('AEGIS_DELIVERY_WEBHOOK_CONCURRENCY', '16'))))
+    else:
+        logger.warning("AEGIS_WEBHOOK_URL is not set; push deliveries stay queued")
+    return DeliveryWorker(channels,
+                          batch_size=int(env.get('AEGIS_DELIVERY_BATCH', BATCH_SIZE)),
+                          max_attempts=int(env.get('AEGIS_DELIVERY_MAX_ATTEMPTS', MAX_ATTEMPTS)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=('run', 'status', 'requeue-dead'))
+    parser.add_argument('--channel', choices=('email', 'webhook'), help='requeue-dead: only this channel')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    init_database()
+
+    if args.command == 'status':
+        for (channel, status), count in sorted(get_outbox_counts().items()):
+            print(f"{channel:8} {status:8} {count}")
+    elif args.command == 'requeue-dead':
+        print(f"Requeued {requeue_dead_deliveries(args.channel)} dead deliveries")
+    else:
+        from metrics import start_server_from_env
+
+        start_server_from_env()
+        worker = create_worker_from_env()
+        try:
+            asyncio.run(worker.run())
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
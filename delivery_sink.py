@@ -0,0 +1,215 @@
+"""Local stand-ins for the SMTP relay and webhook endpoint used by delivery.py.
+
+A minimal SMTP server and an HTTP server that accept (and count) everything,
+with an artificial latency and injected transient (451 / 503) or permanent
+(550 / 400) failures, so the outbox path can be exercised offline:
+
+    python delivery_sink.py --smtp-port 8025 --http-port 8026
+    AEGIS_WEBHOOK_URL=http://127.0.0.1:8026/push python delivery.py run
+
+or load-tested end to end against a scratch database:
+
+    python delivery_sink.py --load-test 100000 --fail-rate 0.01
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SmtpSink:
+    """Just enough ESMTP for smtplib: every message is counted and dropped"""
+
+    def __init__(self, latency=0.0, fail_rate=0.0, reject_rate=0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.reject_rate = reject_rate
+        self.counters = {'sessions': 0, 'messages': 0, 'failed': 0, 'rejected': 0}
+
+    def _end_of_data(self):
+        roll = random.random()
+        if roll < self.reject_rate:
+            self.counters['rejected'] += 1
+            return b'550 5.7.1 injected rejection\r\n'
+        if roll < self.reject_rate + self.fail_rate:
+            self.counters['failed'] += 1
+            return b'451 4.3.0 injected failure\r\n'
+        self.counters['messages'] += 1
+        return b'250 2.0.0 queued\r\n'
+
+    async def handle(self, reader, writer):
+        self.counters['sessions'] += 1
+        writer.write(b'220 aegis-sink ESMTP\r\n')
+        in_data = False
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if in_data:
+                if line == b'.\r\n':
+                    in_data = False
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    writer.write(self._end_of_data())
+                    await writer.drain()
+                continue
+            verb = line[:4].upper()
+            if verb == b'EHLO':
+                writer.write(b'250-aegis-sink\r\n250 8BITMIME\r\n')
+            elif verb == b'DATA':
+                in_data = True
+                writer.write(b'354 end with <CRLF>.<CRLF>\r\n')
+            elif verb == b'QUIT':
+                writer.write(b'221 bye\r\n')
+                await writer.drain()
+                break
+            elif verb in (b'HELO', b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                writer.write(b'250 ok\r\n')
+            else:
+                writer.write(b'502 command not implemented\r\n')
+            await writer.drain()
+        writer.close()
+
+    def start(self, host, port):
+        """Serve on a background event loop; returns the bound (host, port)"""
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name='smtp-sink', daemon=True).start()
+        server = asyncio.run_coroutine_threadsafe(asyncio.start_server(self.handle, host, port), loop).result()
+        return server.sockets[0].getsockname()[:2]
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the pooled client expects
+    latency = 0.0
+    fail_rate = 0.0
+    reject_rate = 0.0
+    counters = {'requests': 0, 'failed': 0, 'rejected': 0}
+    counters_lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        roll = random.random()
+        if roll < self.reject_rate:
+            status, counter = 400, 'rejected'
+        elif roll < self.reject_rate + self.fail_rate:
+            status, counter = 503, 'failed'
+        else:
+            status, counter = 204, 'requests'
+        with self.counters_lock:
+            self.counters[counter] += 1
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_http_server(host='127.0.0.1', port=8026, latency_ms=0, fail_rate=0.0, reject_rate=0.0):
+    WebhookHandler.latency = latency_ms / 1000
+    WebhookHandler.fail_rate = fail_rate
+    WebhookHandler.reject_rate = reject_rate
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    server.daemon_threads = True
+    return server
+
+
+def load_test(n_reminders, users, smtp_sink, http_server, args):
+    """Queue n_reminders due notifications for users with both channels on, then drain the outbox"""
+    os.chdir(tempfile.mkdtemp(prefix='aegis-delivery-'))  # scratch medical_app.db
+    from datetime import datetime
+    from database import connect, get_outbox_counts, init_database
+    from delivery import DeliveryWorker, EmailChannel, WebhookChannel
+
+    logging.getLogger('delivery').setLevel(logging.ERROR)  # dead letters are summed up below instead
+    init_database()
+    conn = connect()
+    conn.executemany("INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, '')",
+                     [(u, f'user{u}', f'user{u}@example.test') for u in range(1, users + 1)])
+    conn.executemany("INSERT INTO notification_preferences (user_id, email_enabled, push_enabled) VALUES (?, 1, 1)",
+                     [(u,) for u in range(1, users + 1)])
+    started = time.perf_counter()
+    now = datetime.now()
+    conn.executemany("INSERT INTO notifications (user_id, type, message, scheduled_time) VALUES (?, 'medicine', ?, ?)",
+                     [(i % users + 1, f'💊 Time to take dose {i}', now) for i in range(n_reminders)])
+    conn.commit()
+    conn.close()
+    queued = sum(get_outbox_counts().values())
+    print(f"Queued {queued} deliveries for {n_reminders} reminders in {time.perf_counter() - started:.2f}s")
+
+    smtp_host, smtp_port = smtp_sink.start('127.0.0.1', 0)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    http_host, http_port = http_server.server_address[:2]
+    worker = DeliveryWorker(
+        [EmailChannel(smtp_host, smtp_port, concurrency=args.email_concurrency),
+         WebhookChannel(f'http://{http_host}:{http_port}/push', concurrency=args.webhook_concurrency)],
+        batch_size=args.batch, poll_seconds=0.1, backoff_base=0.2, backoff_cap=2.0,
+    )
+
+    async def drain():
+        task = asyncio.create_task(worker.run())
+        while True:
+            await asyncio.sleep(0.5)
+            counts = get_outbox_counts()
+            if not any(count for (_, status), count in counts.items() if status in ('pending', 'sending')):
+                break
+        worker.stop()
+        await task
+        return counts
+
+    started = time.perf_counter()
+    counts = asyncio.run(drain())
+    elapsed = time.perf_counter() - started
+    http_server.shutdown()
+
+    done = worker.stats['sent'] + worker.stats['dead']
+    print(f"{done} deliveries in {elapsed:.2f}s ({done / elapsed:.0f}/s, "
+          f"{n_reminders / elapsed * 3600:,.0f} reminders/hour on both channels)")
+    print(f"worker: {worker.stats}")
+    print(f"outbox: {dict(sorted(counts.items()))}")
+    print(f"smtp sink: {smtp_sink.counters}")
+    print(f"http sink: {WebhookHandler.counters}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--smtp-port', type=int, default=8025)
+    parser.add_argument('--http-port', type=int, default=8026)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of sends answered 451 / 503')
+    parser.add_argument('--reject-rate', type=float, default=0.0, help='share of sends answered 550 / 400')
+    parser.add_argument('--load-test', type=int, metavar='N', help='deliver N reminders through the sinks and exit')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--email-concurrency', type=int, default=4)
+    parser.add_argument('--webhook-concurrency', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    smtp_sink = SmtpSink(args.latency_ms / 1000, args.fail_rate, args.reject_rate)
+    http_server = make_http_server(args.host, 0 if args.load_test else args.http_port,
+                                   args.latency_ms, args.fail_rate, args.reject_rate)
+    if args.load_test:
+        load_test(args.load_test, args.users, smtp_sink, http_server, args)
+        return 0
+
+    smtp_host, smtp_port = smtp_sink.start(args.host, args.smtp_port)
+    print(f"SMTP sink on {smtp_host}:{smtp_port}, webhook sink on http://{args.host}:{args.http_port}/push")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"smtp: {smtp_sink.counters}  http: {WebhookHandler.counters}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Columnar, memory-mapped facility dataset.
+
+``ingest`` converts a facility registry (CSV or GeoJSON) into one compact
+file: coordinates and ratings as numeric arrays, specialties dictionary-
+encoded into small integer codes, and names/addresses/phones in offset
+tables. ``FacilityStore`` memory-maps that file, so Streamlit worker
+processes share its pages and never re-parse the source registry.
+
+    python facility_store.py ingest data/hospitals.csv [data/hospitals.facilities]
+"""
+import os
+import sys
+import csv
+import json
+
+import numpy as np
+
+from columnar import StringColumn, map_sections, write_sections
+
+SOURCE_PATH = os.path.join('data', 'hospitals.csv')
+STORE_PATH = os.path.join('data', 'hospitals.facilities')
+
+_MAGIC = b'AEGISFAC1'
+_STRING_FIELDS = ('name', 'address', 'phone')
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('true', '1', 'yes', 'y')
+
+
+def _parse_specialties(value):
+    if isinstance(value, list):
+        return [s for s in value if s]
+    return [s.strip() for s in str(value or '').split('|') if s.strip()]
+
+
+def read_registry(path):
+    """Yield facility dicts from a CSV (specialties '|' separated) or GeoJSON registry"""
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            collection = json.load(f)
+        for feature in collection['features']:
+            props = feature.get('properties') or {}
+            lng, lat = feature['geometry']['coordinates'][:2]
+            yield dict(props, lat=lat, lng=lng)
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+
+def ingest(source_path=SOURCE_PATH, store_path=STORE_PATH):
+    """Convert a facility registry into the columnar store file"""
+    rows = list(read_registry(source_path))
+    n = len(rows)
+
+    specialty_names = []
+    specialty_codes = {}
+    spec_offsets = np.zeros(n + 1, dtype=np.uint32)
+    codes = []
+    for i, row in enumerate(rows):
+        for name in _parse_specialties(row.get('specialties')):
+            if name not in specialty_codes:
+                specialty_codes[name] = len(specialty_names)
+                specialty_names.append(name)
+            codes.append(specialty_codes[name])
+        spec_offsets[i + 1] = len(codes)
+
+    sections = [
+        ('lat', np.array([float(r['lat']) for r in rows], dtype=np.float64)),
+        ('lng', np.array([float(r['lng']) for r in rows], dtype=np.float64)),
+        ('rating', np.array([float(r.get('rating') or 0) for r in rows], dtype=np.float32)),
+        ('emergency', np.array([_parse_bool(r.get('emergency', False)) for r in rows], dtype=np.uint8)),
+        ('beds', np.array([int(r['beds']) if r.get('beds') not in (None, '') else -1 for r in rows],
+                          dtype=np.int32)),
+        ('spec_offsets', spec_offsets),
+        ('spec_codes', np.array(codes, dtype=np.uint16)),
+    ]
+    for field in _STRING_FIELDS:
+        offsets, blob = StringColumn.encode([str(r.get(field) or '') for r in rows])
+        sections += [(f'{field}_offsets', offsets), (field, blob)]
+
+    header = {'count': n, 'specialties': specialty_names, 'source': os.path.basename(source_path)}
+    return write_sections(store_path, _MAGIC, header, sections)
+
+
+class FacilityStore:
+    """Read-only columnar view of the facility dataset"""
+
+    def __init__(self, store_path=STORE_PATH):
+        self.header, arrays, self._mmap = map_sections(store_path, _MAGIC)
+        self.lats = arrays['lat']
+        self.lngs = arrays['lng']
+        self.ratings = arrays['rating']
+        self.emergency = arrays['emergency']
+        self.beds = arrays['beds']
+        self.spec_offsets = arrays['spec_offsets']
+        self.spec_codes = arrays['spec_codes']
+        self.specialty_names = self.header['specialties']
+        self._strings = {
+            field: StringColumn(arrays[f'{field}_offsets'], arrays[field]) for field in _STRING_FIELDS
+        }
+
+    def __len__(self):
+        return self.header['count']
+
+    def specialties(self, i):
+        start, end = self.spec_offsets[i], self.spec_offsets[i + 1]
+        return [self.specialty_names[c] for c in self.spec_codes[start:end]]
+
+    def record(self, i):
+        """Materialize facility i as the dict the pages render"""
+        beds = int(self.beds[i])
+        return {
+            'id': int(i),
+            'name': self._strings['name'][i],
+            'address': self._strings['address'][i],
+            'phone': self._strings['phone'][i],
+            'rating': round(float(self.ratings[i]), 2),
+            'emergency': bool(self.emergency[i]),
+            'specialties': self.specialties(i),
+            'beds': beds if beds >= 0 else None,
+            'lat': float(self.lats[i]),
+            'lng': float(self.lngs[i]),
+        }
+
+
+def open_store(source_path=SOURCE_PATH, store_path=STORE_PATH):
+    """Open the store, re-ingesting first if the source registry is newer"""
+    if os.path.exists(source_path) and (
+            not os.path.exists(store_path) or os.path.getmtime(source_path) > os.path.getmtime(store_path)):
+        ingest(source_path, store_path)
+    return FacilityStore(store_path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'ingest':
+        out = ingest(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else STORE_PATH)
+        print(f"Wrote {len(FacilityStore(out))} facilities to {out}")
+    else:
+        print("usage: python facility_store.py ingest <registry.csv|registry.geojson> [store_path]")
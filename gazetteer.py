@@ -0,0 +1,183 @@
+"""Offline gazetteer of Indian cities, towns and PIN codes.
+
+``compile_gazetteer`` turns ``data/gazetteer.csv`` into a columnar file
+holding every lookup key (normalized name, alias and PIN code) in one sorted
+string column. A prefix is then a contiguous range of that column, found
+with two binary searches, which gives autocomplete and exact coordinate
+resolution for search centers without any network geocoder.
+
+    python gazetteer.py compile [data/gazetteer.csv] [data/gazetteer.idx]
+    python gazetteer.py lookup <prefix> [state]
+"""
+import os
+import re
+import sys
+import csv
+import bisect
+import threading
+
+import numpy as np
+
+from columnar import StringColumn, map_sections, write_sections
+
+SOURCE_PATH = os.path.join('data', 'gazetteer.csv')
+INDEX_PATH = os.path.join('data', 'gazetteer.idx')
+
+_MAGIC = b'AEGISGAZ1'
+_STRING_FIELDS = ('name', 'state', 'kind', 'pincode')
+_KIND_RANK = {'city': 0, 'town': 1, 'village': 2}
+_MAX_SCAN = 512  # keys examined per prefix lookup
+
+STATE_CODES = {
+    'an': 'Andaman and Nicobar Islands', 'ap': 'Andhra Pradesh', 'ar': 'Arunachal Pradesh',
+    'as': 'Assam', 'br': 'Bihar', 'ch': 'Chandigarh', 'cg': 'Chhattisgarh', 'dl': 'Delhi',
+    'ga': 'Goa', 'gj': 'Gujarat', 'hp': 'Himachal Pradesh', 'hr': 'Haryana', 'jh': 'Jharkhand',
+    'jk': 'Jammu and Kashmir', 'ka': 'Karnataka', 'kl': 'Kerala', 'mh': 'Maharashtra',
+    'ml': 'Meghalaya', 'mn': 'Manipur', 'mp': 'Madhya Pradesh', 'mz': 'Mizoram', 'nl': 'Nagaland',
+    'od': 'Odisha', 'or': 'Odisha', 'pb': 'Punjab', 'py': 'Puducherry', 'rj': 'Rajasthan',
+    'sk': 'Sikkim', 'tn': 'Tamil Nadu', 'tg': 'Telangana', 'ts': 'Telangana', 'tr': 'Tripura',
+    'uk': 'Uttarakhand', 'up': 'Uttar Pradesh', 'wb': 'West Bengal',
+}
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', str(text or '').lower()).split())
+
+
+def normalize_state(state):
+    """Normalized full state name for a name or two-letter code"""
+    key = normalize(state)
+    return normalize(STATE_CODES.get(key, key))
+
+
+def compile_gazetteer(source_path=SOURCE_PATH, index_path=INDEX_PATH):
+    """Build the sorted key column and place columns from the CSV"""
+    with open(source_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    keys = set()
+    for i, row in enumerate(rows):
+        names = [row['name']] + [a for a in (row.get('aliases') or '').split('|') if a.strip()]
+        for name in names:
+            keys.add((normalize(name), i))
+        if (row.get('pincode') or '').strip():
+            keys.add((row['pincode'].strip(), i))
+    keys = sorted(keys)
+
+    key_offsets, key_blob = StringColumn.encode([k for k, _ in keys])
+    sections = [
+        ('key_offsets', key_offsets),
+        ('keys', key_blob),
+        ('key_places', np.array([i for _, i in keys], dtype=np.uint32)),
+        ('lat', np.array([float(r['lat']) for r in rows], dtype=np.float64)),
+        ('lng', np.array([float(r['lng']) for r in rows], dtype=np.float64)),
+    ]
+    for field in _STRING_FIELDS:
+        offsets, blob = StringColumn.encode([(r.get(field) or '').strip() for r in rows])
+        sections += [(f'{field}_offsets', offsets), (field, blob)]
+
+    header = {'count': len(rows), 'keys': len(keys), 'source': os.path.basename(source_path)}
+    return write_sections(index_path, _MAGIC, header, sections)
+
+
+class Gazetteer:
+    """Prefix and exact lookups over the compiled gazetteer"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.header, arrays, self._mmap = map_sections(index_path, _MAGIC)
+        self._keys = StringColumn(arrays['key_offsets'], arrays['keys'])
+        self._key_places = arrays['key_places']
+        self.lats = arrays['lat']
+        self.lngs = arrays['lng']
+        self._strings = {
+            field: StringColumn(arrays[f'{field}_offsets'], arrays[field]) for field in _STRING_FIELDS
+        }
+        # State is compared on every candidate, so keep the normalized form
+        self._states = [normalize(self._strings['state'][i]) for i in range(len(self))]
+
+    def __len__(self):
+        return self.header['count']
+
+    def place(self, i):
+        return {
+            'name': self._strings['name'][i],
+            'state': self._strings['state'][i],
+            'kind': self._strings['kind'][i],
+            'pincode': self._strings['pincode'][i],
+            'lat': float(self.lats[i]),
+            'lng': float(self.lngs[i]),
+        }
+
+    def _key_range(self, key):
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + '\uffff', lo)
+        return lo, hi
+
+    def _matches(self, key, state, exact):
+        lo, hi = self._key_range(key)
+        state = normalize_state(state) if state else ''
+        seen = {}
+        for k in range(lo, min(hi, lo + _MAX_SCAN)):
+            i = int(self._key_places[k])
+            if state and not self._states[i].startswith(state):
+                continue
+            is_exact = self._keys[k] == key
+            if exact and not is_exact:
+                continue
+            seen[i] = seen.get(i, False) or is_exact
+        return seen
+
+    def search(self, prefix, state=None, limit=8):
+        """Places whose name, alias or PIN code starts with prefix"""
+        key = normalize(prefix)
+        if not key:
+            return []
+        seen = self._matches(key, state, exact=False)
+        ranked = sorted(seen, key=lambda i: (not seen[i], _KIND_RANK.get(self._strings['kind'][i], 9),
+                                             self._strings['name'][i]))
+        return [self.place(i) for i in ranked[:limit]]
+
+    def resolve(self, query, state=None):
+        """The place exactly named by query (name, alias or PIN), or None"""
+        key = normalize(query)
+        if not key:
+            return None
+        seen = self._matches(key, state, exact=True)
+        if not seen:
+            return None
+        best = min(seen, key=lambda i: (_KIND_RANK.get(self._strings['kind'][i], 9), i))
+        return self.place(best)
+
+
+def open_gazetteer(source_path=SOURCE_PATH, index_path=INDEX_PATH):
+    """Open the gazetteer, recompiling first if the CSV is newer"""
+    if os.path.exists(source_path) and (
+            not os.path.exists(index_path) or os.path.getmtime(source_path) > os.path.getmtime(index_path)):
+        compile_gazetteer(source_path, index_path)
+    return Gazetteer(index_path)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Process-wide gazetteer, loaded on first use"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = open_gazetteer()
+    return _gazetteer
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'compile':
+        out = compile_gazetteer(*sys.argv[2:4])
+        print(f"Wrote {len(Gazetteer(out))} places to {out}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'lookup':
+        for place in get_gazetteer().search(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None):
+            print(f"{place['name']}, {place['state']} {place['pincode']} ({place['lat']}, {place['lng']})")
+    else:
+        print("usage: python gazetteer.py compile [source.csv] [index_path] | lookup <prefix> [state]")
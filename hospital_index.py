@@ -0,0 +1,136 @@
+"""Spatial index over the healthcare facility dataset.
+
+Facility coordinates come from the memory-mapped FacilityStore and are
+projected onto the unit sphere in a KD-tree, so a great-circle radius is an
+exact Euclidean (chord) radius. Candidate sets from the tree are narrowed by the
+attribute bitsets and then ranked with a vectorized haversine distance.
+"""
+import os
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from attribute_index import AttributeIndex, bitset_contains, bitset_indices
+from facility_store import SOURCE_PATH, open_store
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_MILE = 1.609344
+
+
+def _unit_vectors(lat, lng):
+    lat, lng = np.radians(lat), np.radians(lng)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)])
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distance from one point to arrays of points, in km"""
+    lat, lng = np.radians(lat), np.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class HospitalIndex:
+    """Radius and k-nearest queries over a FacilityStore's coordinates"""
+
+    def __init__(self, store):
+        self.store = store
+        self.lats = np.asarray(store.lats, dtype=np.float64)
+        self.lngs = np.asarray(store.lngs, dtype=np.float64)
+        self._tree = cKDTree(_unit_vectors(self.lats, self.lngs)) if len(store) else None
+        self.attributes = AttributeIndex(store)
+        self.generation = 0
+        self.source_mtime = None
+
+    def record(self, i):
+        return self.store.record(i)
+
+    def __len__(self):
+        return len(self.store)
+
+    def _ranked(self, lat, lng, candidates, limit=None):
+        candidates = np.asarray(candidates, dtype=np.intp)
+        distances = haversine_km(lat, lng, self.lats[candidates], self.lngs[candidates])
+        if limit is not None and len(candidates) > limit:
+            keep = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def within_radius(self, lat, lng, radius_km):
+        """Return (indices, distances_km) of facilities within radius_km, nearest first"""
+        if self._tree is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        candidates = self._tree.query_ball_point(_unit_vectors(lat, lng)[0], chord)
+        return self._ranked(lat, lng, candidates)
+
+    def nearest(self, lat, lng, k):
+        """Return (indices, distances_km) of the k nearest facilities"""
+        if self._tree is None or k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        k = min(k, len(self))
+        _, candidates = self._tree.query(_unit_vectors(lat, lng)[0], k=k)
+        return self._ranked(lat, lng, np.atleast_1d(candidates))
+
+    def all_by_distance(self, lat, lng, limit=None):
+        """Every facility nearest first, or only the nearest limit of them (one tree query)"""
+        if limit is not None:
+            return self.nearest(lat, lng, limit)
+        return self._ranked(lat, lng, np.arange(len(self)))
+
+    def search(self, lat, lng, radius_km=None, emergency_only=False, specialties=(), min_rating=None, limit=None):
+        """Return (indices, distances_km) of facilities passing the filters, nearest first.
+
+        With limit, only the nearest limit matches are returned, so an unbounded
+        radius costs a k-nearest tree query rather than every facility.
+        """
+        words = self.attributes.mask(emergency_only, specialties, min_rating)
+        if radius_km is None and words is None and limit is not None:
+            return self.nearest(lat, lng, limit)
+        if radius_km is not None:
+            if self._tree is None:
+                return np.empty(0, dtype=np.intp), np.empty(0)
+            chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+            candidates = np.asarray(self._tree.query_ball_point(_unit_vectors(lat, lng)[0], chord), dtype=np.intp)
+            if words is not None and len(candidates):
+                candidates = candidates[bitset_contains(words, candidates)]
+        elif words is not None:
+            candidates = bitset_indices(words, len(self))
+        else:
+            candidates = np.arange(len(self))
+        return self._ranked(lat, lng, candidates, limit)
+
+
+_index = None
+_index_lock = threading.Lock()
+_generation = 0
+
+
+def _source_mtime():
+    return os.path.getmtime(SOURCE_PATH) if os.path.exists(SOURCE_PATH) else None
+
+
+def _is_stale(index):
+    return index is None or _source_mtime() != index.source_mtime
+
+
+def get_hospital_index():
+    """Process-wide facility index, reloaded when the source registry changes.
+
+    Each load gets a new ``generation`` so caches keyed on facility rows can
+    tell results from an older dataset apart.
+    """
+    global _index, _generation
+    if _is_stale(_index):
+        with _index_lock:
+            if _is_stale(_index):
+                source_mtime = _source_mtime()
+                index = HospitalIndex(open_store())
+                _generation += 1
+                index.generation = _generation
+                index.source_mtime = source_mtime
+                _index = index
+    return _index
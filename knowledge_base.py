@@ -0,0 +1,227 @@
+"""Vetted-article knowledge base behind the medical chatbot.
+
+Articles are markdown files with a small front-matter header (title, icon,
+keywords, ``fallback: true`` on exactly one of them). ``build_index`` tokenizes and stems
+them into an inverted index whose postings carry precomputed BM25 weights,
+and writes everything to a single binary file. ``KnowledgeBase`` memory-maps
+that file, so a lookup is a binary search per query term plus a handful of
+numpy adds over the matching postings.
+
+Rebuild the index after editing articles with::
+
+    python knowledge_base.py build
+"""
+import os
+import re
+import sys
+import json
+import glob
+import bisect
+import threading
+
+import numpy as np
+
+from columnar import StringColumn, map_sections, write_sections
+
+ARTICLES_DIR = os.path.join('data', 'knowledge_base', 'articles')
+INDEX_PATH = os.path.join('data', 'knowledge_base', 'kb_index.bin')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2
+KEYWORD_BOOST = 3
+MIN_SCORE = 1.0
+
+_MAGIC = b'AEGISKB2'
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a about all an and any are as at be been but by can could do does for from
+get had has have how i if in into is it its me my of on or our should so
+than that the their them then there these they this to was we what when
+where which who why will with would you your
+best cause help know manage need sign symptom tell treat way
+""".split())
+
+
+# Tokenization -----------------------------------------------------------
+def stem(word):
+    """Light suffix-stripping stemmer (plural and common verb/adverb endings)"""
+    if len(word) <= 3:
+        return word
+    for suffix, replacement in (('sses', 'ss'), ('ies', 'y'), ('ness', ''), ('ing', ''),
+                                ('edly', ''), ('ed', ''), ('ly', ''), ('es', 'e')):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    stems = (stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS)
+    return [s for s in stems if s not in _STOPWORDS]
+
+
+# Articles ---------------------------------------------------------------
+def load_articles(articles_dir=ARTICLES_DIR):
+    """Parse every *.md article into a dict with title, icon, keywords, body"""
+    articles = []
+    for path in sorted(glob.glob(os.path.join(articles_dir, '*.md'))):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        meta = {}
+        body = text
+        if text.startswith('---\n'):
+            header, _, body = text[4:].partition('\n---\n')
+            for line in header.splitlines():
+                key, _, value = line.partition(':')
+                meta[key.strip()] = value.strip()
+        articles.append({
+            'id': os.path.splitext(os.path.basename(path))[0],
+            'title': meta.get('title', ''),
+            'icon': meta.get('icon', ''),
+            'keywords': [k.strip() for k in meta.get('keywords', '').split(',') if k.strip()],
+            'fallback': meta.get('fallback', '').lower() == 'true',
+            'body': body.rstrip('\n'),
+        })
+    return articles
+
+
+def build_index(articles_dir=ARTICLES_DIR, index_path=INDEX_PATH):
+    """Build the BM25 inverted index file for all articles in articles_dir"""
+    articles = load_articles(articles_dir)
+    indexed = [a for a in articles if not a['fallback']]
+    fallbacks = [a for a in articles if a['fallback']]
+    if len(fallbacks) != 1:
+        raise ValueError(f"{articles_dir} needs exactly one article with 'fallback: true', found {len(fallbacks)}")
+
+    term_freqs = []
+    for article in indexed:
+        tokens = (tokenize(article['title']) * TITLE_BOOST
+                  + tokenize(' '.join(article['keywords'])) * KEYWORD_BOOST
+                  + tokenize(article['body']))
+        freqs = {}
+        for token in tokens:
+            freqs[token] = freqs.get(token, 0) + 1
+        term_freqs.append((freqs, len(tokens)))
+
+    n_docs = len(indexed)
+    avgdl = sum(dl for _, dl in term_freqs) / n_docs if n_docs else 0.0
+    postings = {}
+    for doc_id, (freqs, _) in enumerate(term_freqs):
+        for term, tf in freqs.items():
+            postings.setdefault(term, []).append((doc_id, tf))
+
+    terms = sorted(postings)
+    term_offsets, term_blob = StringColumn.encode(terms)
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.uint32)
+    np.cumsum([len(postings[t]) for t in terms], out=post_offsets[1:])
+
+    post_docs = np.empty(int(post_offsets[-1]), dtype=np.uint32)
+    post_weights = np.empty(int(post_offsets[-1]), dtype=np.float32)
+    for i, term in enumerate(terms):
+        plist = postings[term]
+        idf = np.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+        start = post_offsets[i]
+        for j, (doc_id, tf) in enumerate(plist):
+            dl = term_freqs[doc_id][1]
+            post_docs[start + j] = doc_id
+            post_weights[start + j] = idf * tf * (BM25_K1 + 1) / (
+                tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+
+    doc_offsets, doc_blob = StringColumn.encode([
+        json.dumps({k: a[k] for k in ('id', 'title', 'icon', 'body')})
+        for a in indexed + fallbacks
+    ])
+
+    header = {'n_docs': n_docs, 'n_terms': len(terms), 'has_fallback': True}
+    return write_sections(index_path, _MAGIC, header, [
+        ('term_offsets', term_offsets), ('terms', term_blob),
+        ('post_offsets', post_offsets), ('post_docs', post_docs), ('post_weights', post_weights),
+        ('doc_offsets', doc_offsets), ('docs', doc_blob),
+    ])
+
+
+class KnowledgeBase:
+    """Read-only view of a prebuilt index file"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.header, arrays, self._mmap = map_sections(index_path, _MAGIC)
+        if not self.header.get('has_fallback'):
+            raise ValueError(f"{index_path} was built without a fallback article")
+        self._terms = StringColumn(arrays['term_offsets'], arrays['terms'])
+        self._post_offsets = arrays['post_offsets']
+        self._post_docs = arrays['post_docs']
+        self._post_weights = arrays['post_weights']
+        self._docs = StringColumn(arrays['doc_offsets'], arrays['docs'])
+        self.n_docs = self.header['n_docs']
+
+    def _postings(self, term):
+        i = bisect.bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            start, end = self._post_offsets[i], self._post_offsets[i + 1]
+            return self._post_docs[start:end], self._post_weights[start:end]
+        return None
+
+    def document(self, doc_id):
+        return json.loads(self._docs[doc_id])
+
+    def search(self, query, k=3):
+        """Return [(doc_id, score)] for the top-k articles by BM25"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = self._postings(term)
+            if postings is not None:
+                scores[postings[0]] += postings[1]
+        k = min(k, self.n_docs)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def best_article(self, query):
+        """Highest-ranked article, or the fallback article when nothing matches well"""
+        results = self.search(query, k=1)
+        if results and results[0][1] >= MIN_SCORE:
+            return self.document(results[0][0])
+        return self.document(self.n_docs)
+
+
+def _index_is_stale(articles_dir, index_path):
+    if not os.path.exists(index_path):
+        return True
+    index_mtime = os.path.getmtime(index_path)
+    paths = glob.glob(os.path.join(articles_dir, '*.md'))
+    return os.path.getmtime(articles_dir) > index_mtime or any(os.path.getmtime(p) > index_mtime for p in paths)
+
+
+_kb = None
+_kb_lock = threading.Lock()
+
+
+def get_knowledge_base():
+    """Process-wide knowledge base; (re)builds the index file if articles changed"""
+    global _kb
+    if _kb is None:
+        with _kb_lock:
+            if _kb is None:
+                if _index_is_stale(ARTICLES_DIR, INDEX_PATH):
+                    build_index()
+                try:
+                    _kb = KnowledgeBase()
+                except ValueError:
+                    # Index written by an older format version
+                    build_index()
+                    _kb = KnowledgeBase()
+    return _kb
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'build':
+        articles_dir = sys.argv[2] if len(sys.argv) > 2 else ARTICLES_DIR
+        index_path = sys.argv[3] if len(sys.argv) > 3 else INDEX_PATH
+        print(f"Wrote {build_index(articles_dir, index_path)}")
+    else:
+        print("usage: python knowledge_base.py build [articles_dir] [index_path]")
@@ -0,0 +1,105 @@
+"""Per-session memory accounting for sizing Streamlit workers.
+
+``deep_sizeof`` estimates what a session-state value retains (containers are
+walked, DataFrames report their deep memory usage). Objects reachable from a
+shared cache are still counted, so the figure is an upper bound on what one
+session adds. ``SessionRegistry`` keeps the latest footprint of every active
+session in this process, which together with the process RSS gives the
+numbers needed to size workers for a concurrent user count.
+"""
+import os
+import sys
+import time
+import threading
+
+SESSION_IDLE_SECONDS = 30 * 60  # sessions silent this long drop out of the report
+PRUNE_INTERVAL_SECONDS = 60  # record() sweeps idle sessions at most this often
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes retained by obj, counting each object once"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    memory_usage = getattr(obj, 'memory_usage', None)
+    if callable(memory_usage) and hasattr(obj, 'columns'):  # pandas DataFrame
+        return int(memory_usage(deep=True).sum())
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_footprint(state):
+    """[(key, bytes)] for every session-state entry, largest first"""
+    seen = set()
+    sizes = [(str(key), deep_sizeof(state[key], seen)) for key in list(state.keys())]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)
+
+
+def process_rss_bytes():
+    """Current resident set size of this process, or None where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+class SessionRegistry:
+    """Latest session-state footprint per session id in this process"""
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._sessions = {}  # session_id -> (last_seen, total_bytes, username)
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def _prune(self, now):
+        """Drop idle sessions; caller holds the lock"""
+        cutoff = now - self.idle_seconds
+        for session_id in [s for s, (seen, _, _) in self._sessions.items() if seen < cutoff]:
+            del self._sessions[session_id]
+        self._last_prune = now
+
+    def record(self, session_id, total_bytes, username=None):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, total_bytes, username)
+            # Sweep here too, so the registry stays bounded when nobody reads the report
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+
+    def snapshot(self):
+        """Summary of active sessions: count, total, mean and max bytes, plus process RSS"""
+        with self._lock:
+            self._prune(time.monotonic())
+            sizes = [total for _, total, _ in self._sessions.values()]
+        return {
+            'sessions': len(sizes),
+            'total_bytes': sum(sizes),
+            'mean_bytes': sum(sizes) / len(sizes) if sizes else 0,
+            'max_bytes': max(sizes, default=0),
+            'process_rss_bytes': process_rss_bytes(),
+        }
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
@@ -0,0 +1,292 @@
+"""Process metrics in the Prometheus text format.
+
+``REGISTRY`` holds counters, gauges and histograms, optionally split by
+labels. Each labeled series keeps its own small lock, so hot paths only ever
+contend with other updates to the same series; the registry lock is taken
+only when a new metric or label combination first appears. Gauges can also
+read their value from a callback at scrape time, and ``register_cache``
+exports the ``stats`` dict of an in-process cache as event counters plus a
+hit ratio.
+
+``start_server`` serves ``/metrics`` on a daemon thread. The app starts it
+when ``AEGIS_METRICS_PORT`` is set (each Streamlit process needs its own
+port).
+"""
+import os
+import math
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT_ENV = 'AEGIS_METRICS_PORT'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Series:
+    """One label combination: a value guarded by its own lock"""
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+
+class _HistogramSeries:
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._series = {}  # label values -> series
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        return _Series()
+
+    def _get(self, labels):
+        key = tuple([str(labels.get(n, '')) for n in self.label_names]) if labels else ()
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def _snapshot(self):
+        with self._lock:  # series may be added by other threads while scraping
+            return sorted(self._series.items())
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def collect(self):
+        lines = self._header()
+        for key, series in self._snapshot():
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(series.value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        series = self._get(labels)
+        with series.lock:
+            series.value += amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        series = self._get(labels)
+        with series.lock:
+            series.value = value
+
+    def inc(self, amount=1, **labels):
+        series = self._get(labels)
+        with series.lock:
+            series.value += amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the (unlabeled) value from function() at scrape time"""
+        self._function = function
+
+    def collect(self):
+        if self._function is None:
+            return super().collect()
+        try:
+            value = self._function()
+        except Exception:
+            logger.exception("Gauge callback for %s failed", self.name)
+            return []
+        return self._header() + ([] if value is None else [f'{self.name} {_format_value(value)}'])
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value, **labels):
+        series = self._get(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with series.lock:
+            series.counts[slot] += 1
+            series.sum += value
+
+    def time(self, **labels):
+        """Context manager observing the wall time of its block"""
+        return _Timer(self, labels)
+
+    def collect(self):
+        lines = self._header()
+        for key, series in self._snapshot():
+            with series.lock:
+                counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, [le])} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Named metrics of this process; get-or-create so modules can share a metric"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._caches = {}  # name -> (stats dict, hit keys, miss keys)
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labels, buckets)
+
+    def register_cache(self, name, stats, hits=('hits',), misses=('misses',)):
+        """Export a cache's live stats dict as aegis_cache_events_total and aegis_cache_hit_ratio"""
+        with self._lock:
+            self._caches[name] = (stats, tuple(hits), tuple(misses))
+
+    def _collect_caches(self):
+        if not self._caches:
+            return []
+        events = ['# HELP aegis_cache_events_total Cache events by cache and kind',
+                  '# TYPE aegis_cache_events_total counter']
+        ratios = ['# HELP aegis_cache_hit_ratio Hits over lookups since process start',
+                  '# TYPE aegis_cache_hit_ratio gauge']
+        for name, (stats, hits, misses) in sorted(self._caches.items()):
+            snapshot = dict(stats)
+            for event, value in sorted(snapshot.items()):
+                events.append(f'aegis_cache_events_total{_format_labels(("cache", "event"), (name, event))} {value}')
+            hit = sum(snapshot.get(k, 0) for k in hits)
+            total = hit + sum(snapshot.get(k, 0) for k in misses)
+            if total:
+                ratios.append(f'aegis_cache_hit_ratio{_format_labels(("cache",), (name,))} {_format_value(hit / total)}')
+        return events + ratios
+
+    def exposition(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        lines.extend(self._collect_caches())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the Streamlit log
+
+
+def start_server(port, host='0.0.0.0', registry=REGISTRY):
+    """Serve /metrics from a daemon thread; returns the server"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def start_server_from_env():
+    """Start the endpoint on AEGIS_METRICS_PORT, or return None if unset or the port is taken"""
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    try:
+        server = start_server(int(port))
+    except OSError as exc:
+        logger.warning("Metrics endpoint not started on port %s: %s", port, exc)
+        return None
+    logger.info("Serving metrics on port %s", port)
+    return server
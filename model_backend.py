@@ -0,0 +1,209 @@
+"""Pluggable backends for symptom analysis and chatbot answers.
+
+``RuleBasedBackend`` wraps the in-process rules. ``HttpBackend`` routes the
+same calls to a local inference server through one pooled async HTTP client
+running on a background event loop. Concurrent calls are coalesced into
+micro-batches, the number of in-flight HTTP requests is capped, and any
+timeout, server error or malformed response falls back to the rules for
+that call.
+
+The backend is selected with environment variables:
+
+    AEGIS_MODEL_BACKEND        rules (default) | http
+    AEGIS_MODEL_URL            base URL of the inference server
+    AEGIS_MODEL_TIMEOUT        seconds before falling back to rules
+    AEGIS_MODEL_CONCURRENCY    max in-flight HTTP requests
+    AEGIS_MODEL_MAX_BATCH      max inputs per HTTP request
+    AEGIS_MODEL_BATCH_WAIT_MS  how long a batch waits to fill up
+
+``stub_inference_server.py`` implements the server side for offline tests.
+"""
+import os
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'http://127.0.0.1:8765'
+
+
+class ModelBackend(ABC):
+    """Interface shared by all backends"""
+
+    @abstractmethod
+    def analyze(self, symptoms_text, user_type='patient'):
+        """Return (diagnosis, severity, recommendations, professional_note)"""
+
+    @abstractmethod
+    def chat_stream(self, question, user_type='patient'):
+        """Yield the chatbot answer in chunks"""
+
+    def close(self):
+        pass
+
+
+class RuleBasedBackend(ModelBackend):
+    """Keyword rules and the knowledge base, evaluated in-process"""
+
+    def __init__(self, analyze_fn, chat_stream_fn):
+        self._analyze = analyze_fn
+        self._chat_stream = chat_stream_fn
+
+    def analyze(self, symptoms_text, user_type='patient'):
+        return self._analyze(symptoms_text, user_type)
+
+    def chat_stream(self, question, user_type='patient'):
+        return self._chat_stream(question, user_type)
+
+
+class _MicroBatcher:
+    """Coalesces concurrent requests for one endpoint into batched POSTs"""
+
+    def __init__(self, client, path, semaphore, max_batch, batch_wait):
+        self._client = client
+        self._path = path
+        self._semaphore = semaphore
+        self._max_batch = max_batch
+        self._batch_wait = batch_wait
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._batch_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self._send(batch))
+
+    async def _send(self, batch):
+        try:
+            async with self._semaphore:
+                response = await self._client.post(self._path, json={'inputs': [p for p, _ in batch]})
+                response.raise_for_status()
+                outputs = response.json()['outputs']
+            if len(outputs) != len(batch):
+                raise ValueError(f"expected {len(batch)} outputs, got {len(outputs)}")
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class HttpBackend(ModelBackend):
+    """Client for a local inference server, with rules as the fallback"""
+
+    def __init__(self, base_url, fallback, timeout=2.0, max_concurrency=8,
+                 max_batch=16, batch_wait_ms=10, pool_size=16):
+        import httpx  # optional dependency, only needed for this backend
+
+        self.base_url = base_url
+        self.fallback = fallback
+        self.timeout = timeout
+        self.stats = {'requests': 0, 'fallbacks': 0}
+        self._stats_lock = threading.Lock()  # _call runs on many script threads at once
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='model-backend', daemon=True)
+        self._thread.start()
+
+        async def setup():
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=httpx.Timeout(timeout),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+            semaphore = asyncio.Semaphore(max_concurrency)
+            batchers = {
+                kind: _MicroBatcher(client, f'/v1/{kind}', semaphore, max_batch, batch_wait_ms / 1000)
+                for kind in ('analyze', 'chat')
+            }
+            return client, batchers
+
+        self._client, self._batchers = self._run(setup()).result()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _call(self, kind, payload, parse):
+        """Send one input through the batcher and parse the output; None means use the fallback"""
+        self._count('requests')
+        future = self._run(self._batchers[kind].submit(payload))
+        try:
+            return parse(future.result(self.timeout))
+        except Exception as exc:  # timeouts, HTTP errors and outputs missing expected keys alike
+            future.cancel()
+            self._count('fallbacks')
+            logger.warning("Model backend %s call failed (%s), using rules", kind, exc.__class__.__name__)
+            return None
+
+    def analyze(self, symptoms_text, user_type='patient'):
+        result = self._call(
+            'analyze', {'symptoms': symptoms_text, 'user_type': user_type},
+            lambda output: (str(output['diagnosis']), str(output['severity']),
+                            [str(r) for r in output['recommendations']], str(output.get('professional_note') or ''))
+        )
+        if result is None:
+            return self.fallback.analyze(symptoms_text, user_type)
+        return result
+
+    def chat_stream(self, question, user_type='patient'):
+        answer = self._call('chat', {'question': question, 'user_type': user_type},
+                            lambda output: str(output['answer']))
+        if answer is None:
+            yield from self.fallback.chat_stream(question, user_type)
+        else:
+            yield answer
+
+    def close(self):
+        async def shutdown():
+            for batcher in self._batchers.values():
+                batcher.cancel()
+            await self._client.aclose()
+
+        self._run(shutdown()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def create_backend(rules):
+    """Build the backend selected by AEGIS_MODEL_BACKEND, falling back to rules"""
+    kind = os.environ.get('AEGIS_MODEL_BACKEND', 'rules').lower()
+    if kind != 'http':
+        return rules
+    try:
+        return HttpBackend(
+            os.environ.get('AEGIS_MODEL_URL', DEFAULT_URL),
+            fallback=rules,
+            timeout=float(os.environ.get('AEGIS_MODEL_TIMEOUT', '2.0')),
+            max_concurrency=int(os.environ.get('AEGIS_MODEL_CONCURRENCY', '8')),
+            max_batch=int(os.environ.get('AEGIS_MODEL_MAX_BATCH', '16')),
+            batch_wait_ms=float(os.environ.get('AEGIS_MODEL_BATCH_WAIT_MS', '10')),
+        )
+    except ImportError:
+        logger.warning("AEGIS_MODEL_BACKEND=http needs httpx; using rule-based backend")
+        return rules
@@ -0,0 +1,333 @@
+"""Consultation PDF reports with a content-addressed cache.
+
+A report is identified by a hash of everything that ends up in it (the
+consultation, the user fields it prints and ``TEMPLATE_VERSION``), so equal
+content always maps to the same PDF and changing the template invalidates
+every cached copy. Built PDFs are kept in a byte-bounded memory LRU; entries
+evicted from memory spill to ``report_cache/`` on disk, which is pruned
+oldest-first past its own size limit.
+
+``export_pdf_bundle`` renders many reports at once on a process pool
+(ReportLab is CPU-bound) and streams them, in selection order, into a ZIP or
+a merged PDF (``pypdf`` optional) written to a temporary file on disk. A ZIP
+holds at most a render window of reports in memory; pypdf keeps every page of
+a merged PDF until it is written, so merged bundles are capped at
+``MERGED_BUNDLE_MAX_REPORTS``.
+"""
+import io
+import os
+import json
+import zipfile
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+from metrics import REGISTRY
+from profiler import timed
+
+TEMPLATE_VERSION = 2  # bump whenever generate_pdf_report's layout changes
+CACHE_DIR = 'report_cache'
+MEMORY_LIMIT_BYTES = 32 * 1024 * 1024
+DISK_LIMIT_BYTES = 256 * 1024 * 1024
+MERGED_BUNDLE_MAX_REPORTS = 50  # pypdf holds a merged bundle's pages in memory until it is written
+POOL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_USER_FIELDS = ('username', 'user_type', 'medical_id', 'specialization')
+
+PDF_RENDER_SECONDS = REGISTRY.histogram('aegis_pdf_render_seconds', 'Time to render one report in this process')
+PDF_BUNDLE_SECONDS = REGISTRY.histogram('aegis_pdf_bundle_seconds', 'Time to export a report bundle', labels=('format',))
+PDF_BUNDLE_REPORTS = REGISTRY.counter('aegis_pdf_bundle_reports_total', 'Reports written into bundles')
+
+
+# Enhanced PDF generation
+def generate_pdf_report(consultation_data, user_info):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Enhanced title with logo placeholder
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        spaceAfter=30,
+        textColor=colors.HexColor('#2E86AB'),
+        alignment=1  # Center alignment
+    )
+    story.append(Paragraph("🩺 AEGIS HEALTH", title_style))
+    story.append(Paragraph("Comprehensive Medical Consultation Report", styles['Heading2']))
+    story.append(Spacer(1, 20))
+
+    # Patient information table
+    patient_data = [
+        ['Patient Information', ''],
+        ['Username:', user_info['username']],
+        ['User Type:', user_info.get('user_type', 'Patient').title()],
+        # No generation time: cached copies are served long after they were built
+        ['Date of Consultation:', consultation_data['date']],
+    ]
+
+    if user_info.get('medical_id'):
+        patient_data.append(['Medical ID:', user_info['medical_id']])
+    if user_info.get('specialization'):
+        patient_data.append(['Specialization:', user_info['specialization']])
+
+    patient_table = Table(patient_data, colWidths=[2*inch, 4*inch])
+    patient_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(patient_table)
+    story.append(Spacer(1, 20))
+
+    # Rest of the report content...
+    # [Previous PDF content with enhancements]
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def report_key(consultation_data, user_info):
+    """Content hash identifying the PDF for this consultation and user"""
+    content = {
+        'template': TEMPLATE_VERSION,
+        'consultation': consultation_data,
+        'user': {field: user_info.get(field) for field in _USER_FIELDS},
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ReportCache:
+    """Memory LRU of PDF bytes with an on-disk spill directory"""
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit=MEMORY_LIMIT_BYTES, disk_limit=DISK_LIMIT_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'builds': 0, 'spills': 0}
+        self._entries = OrderedDict()  # key -> pdf bytes
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pdf')
+
+    def put(self, key, pdf):
+        """Insert into the memory LRU, spilling the oldest entries to disk"""
+        spilled = []
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = pdf
+            self._memory_bytes += len(pdf)
+            while self._memory_bytes > self.memory_limit and len(self._entries) > 1:
+                old_key, old_pdf = self._entries.popitem(last=False)
+                self._memory_bytes -= len(old_pdf)
+                spilled.append((old_key, old_pdf))
+        for old_key, old_pdf in spilled:
+            self._spill(old_key, old_pdf)
+
+    def _spill(self, key, pdf):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+        self.stats['spills'] += 1
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.pdf')]
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+            if total <= self.disk_limit:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Cached PDF bytes for key, or None"""
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return pdf
+        try:
+            with open(self._path(key), 'rb') as f:
+                pdf = f.read()
+        except FileNotFoundError:
+            return None
+        self.stats['disk_hits'] += 1
+        self.put(key, pdf)
+        return pdf
+
+    def get_or_build(self, consultation_data, user_info):
+        key = report_key(consultation_data, user_info)
+        pdf = self.get(key)
+        if pdf is None:
+            with PDF_RENDER_SECONDS.time():
+                pdf = generate_pdf_report(consultation_data, user_info).getvalue()
+            self.stats['builds'] += 1
+            self.put(key, pdf)
+        return pdf
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache():
+    """Process-wide report cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReportCache()
+                REGISTRY.register_cache('pdf_reports', _cache.stats, hits=('memory_hits', 'disk_hits'), misses=('builds',))
+    return _cache
+
+
+@timed('pdf.get_pdf_report')
+def get_pdf_report(consultation_data, user_info):
+    """PDF bytes for a consultation, built only on a cache miss"""
+    return get_report_cache().get_or_build(consultation_data, user_info)
+
+
+def build_pdf_bytes(consultation_data, user_info):
+    """Process-pool entry point: one report as bytes"""
+    return generate_pdf_report(consultation_data, user_info).getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_report_pool():
+    """Shared process pool for bundle exports, started on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a threaded Streamlit server is unsafe
+                _pool = ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _pool_result(future):
+    """Bytes from a pool render, or None (and a fresh pool next time) if the pool died"""
+    global _pool
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return None
+
+
+def merged_pdf_available():
+    try:
+        import pypdf  # noqa: F401  optional, only needed for merged bundles
+    except ImportError:
+        return False
+    return True
+
+
+def _iter_pdfs(consultations, user_info, progress):
+    """Yield (index, pdf bytes) in order; cache misses render on the process pool"""
+    cache = get_report_cache()
+    keys = [report_key(c, user_info) for c in consultations]
+    misses = sum(1 for key in keys if key not in cache)
+    pool = get_report_pool() if misses > 1 else None
+    window = 2 * POOL_WORKERS  # bounds the renders in flight, and so the PDFs held in memory
+    pending = deque()
+
+    def submit(i):
+        pdf = cache.get(keys[i])
+        if pdf is None and pool is not None:
+            pdf = pool.submit(build_pdf_bytes, consultations[i], user_info)
+        pending.append((i, pdf))
+
+    total = len(consultations)
+    for i in range(min(window, total)):
+        submit(i)
+    for done in range(1, total + 1):
+        i, pdf = pending.popleft()
+        if not isinstance(pdf, bytes):
+            pdf = _pool_result(pdf) if pdf is not None else None
+            if pdf is None:
+                with PDF_RENDER_SECONDS.time():
+                    pdf = build_pdf_bytes(consultations[i], user_info)
+            cache.stats['builds'] += 1
+            cache.put(keys[i], pdf)
+        if i + window < total:
+            submit(i + window)
+        if progress:
+            progress(done, total)
+        yield i, pdf
+
+
+@timed('pdf.export_pdf_bundle')
+def export_pdf_bundle(consultations, user_info, file_names, merged=False, progress=None):
+    """Render reports for consultations into one temp file on disk (ZIP, or merged PDF).
+
+    progress(done, total) is called after each report. Returns the file
+    opened for reading (an io.BufferedReader, which st.download_button
+    accepts without a copy of ours); its path is already unlinked, so
+    closing it frees the disk space. Merged bundles of more than
+    MERGED_BUNDLE_MAX_REPORTS reports raise ValueError.
+    """
+    if merged and len(consultations) > MERGED_BUNDLE_MAX_REPORTS:
+        raise ValueError(f"merged PDFs take at most {MERGED_BUNDLE_MAX_REPORTS} reports")
+    fd, path = tempfile.mkstemp(prefix='aegis-bundle-', suffix='.pdf' if merged else '.zip')
+    try:
+        with os.fdopen(fd, 'wb') as bundle, PDF_BUNDLE_SECONDS.time(format='pdf' if merged else 'zip'):
+            if merged:
+                from pypdf import PdfWriter
+
+                writer = PdfWriter()
+                for _, pdf in _iter_pdfs(consultations, user_info, progress):
+                    writer.append(io.BytesIO(pdf))
+                writer.write(bundle)
+            else:
+                # PDFs are already compressed, so store them as-is
+                with zipfile.ZipFile(bundle, 'w', compression=zipfile.ZIP_STORED) as archive:
+                    for i, pdf in _iter_pdfs(consultations, user_info, progress):
+                        archive.writestr(file_names[i], pdf)
+        PDF_BUNDLE_REPORTS.inc(len(consultations))
+        return open(path, 'rb')
+    finally:
+        os.remove(path)  # an open handle keeps the data until it is closed
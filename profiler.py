@@ -0,0 +1,164 @@
+"""Per-rerun timing of data helpers and page sections.
+
+``timed`` wraps a helper and ``section`` wraps a block; each records wall
+time, call count and (for helpers returning a sized result) row count into
+the profile of the rerun running on the current thread. ``run`` opens that
+profile: a full script rerun opens one, and a fragment rerun outside any
+open profile opens its own. Timings are inclusive, so a section also counts
+the helpers it calls.
+
+Profiling is off unless enabled with environment variables, and when off
+``timed`` returns the function unchanged and ``section``/``run`` hand back a
+shared no-op context, so instrumented code pays nothing measurable:
+
+    AEGIS_PROFILE      1 to collect timings
+    AEGIS_PROFILE_LOG  file to append one JSON line per rerun (rotated at 1 MB)
+"""
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from logging.handlers import RotatingFileHandler
+
+ENABLED = os.environ.get('AEGIS_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+LOG_PATH = os.environ.get('AEGIS_PROFILE_LOG')
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+
+
+class Profile:
+    """Timings collected during one rerun"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.entries = {}  # name -> [calls, seconds, rows]
+
+    def add(self, name, seconds, rows=None):
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = [0, 0.0, None]
+        entry[0] += 1
+        entry[1] += seconds
+        if rows is not None:
+            entry[2] = (entry[2] or 0) + rows
+
+    def summary(self):
+        """Plain-dict form, slowest entries first"""
+        rows = [{'name': name, 'calls': calls, 'ms': round(seconds * 1000, 2), 'rows': n}
+                for name, (calls, seconds, n) in self.entries.items()]
+        rows.sort(key=lambda r: r['ms'], reverse=True)
+        return {'run': self.name, 'started_at': self.started_at, 'ms': round(self.seconds * 1000, 2), 'entries': rows}
+
+
+class _NullContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+class _Section:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        profile = getattr(_local, 'profile', None)
+        if profile is not None:
+            profile.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Run:
+    def __init__(self, name, sink):
+        self.name = name
+        self.sink = sink
+        self.profile = None
+
+    def __enter__(self):
+        if getattr(_local, 'profile', None) is not None:
+            # Already inside a rerun (e.g. a fragment during a full run): just a section
+            self.section = _Section(self.name).__enter__()
+            return None
+        self.section = None
+        self.profile = _local.profile = Profile(self.name)
+        self.start = time.perf_counter()
+        return self.profile
+
+    def __exit__(self, *exc):
+        if self.section is not None:
+            return self.section.__exit__(*exc)
+        # st.rerun()/st.stop() end a run with an exception; the timings still count
+        self.profile.seconds = time.perf_counter() - self.start
+        _local.profile = None
+        summary = self.profile.summary()
+        if self.sink is not None:
+            self.sink(summary)
+        if _log_handler() is not None:
+            logger.info(json.dumps(summary))
+        return False
+
+
+def run(name, sink=None):
+    """Open the profile for one rerun and pass its summary to sink(summary) when it ends.
+
+    Yields the Profile, or None when nested in another run or disabled.
+    """
+    return _Run(name, sink) if ENABLED else _NULL
+
+
+def section(name):
+    """Time a block as `name` in the current rerun's profile"""
+    return _Section(name) if ENABLED else _NULL
+
+
+def timed(name=None, rows=False):
+    """Decorator: time each call; with rows=True also count len() of the result"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            profile = getattr(_local, 'profile', None)
+            if profile is not None:
+                count = len(result) if rows and hasattr(result, '__len__') else None
+                profile.add(label, time.perf_counter() - start, count)
+            return result
+        return wrapper
+    return decorate
+
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def _log_handler():
+    """Rotating file handler for AEGIS_PROFILE_LOG, attached on first use"""
+    global _handler
+    if LOG_PATH and _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+                _handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(_handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+    return _handler
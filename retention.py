@@ -0,0 +1,181 @@
+"""Retention and compaction for the notifications tables.
+
+Notifications scheduled more than ``RETENTION_DAYS`` ago (delivered, or
+expired without ever being delivered) are deleted, along with delivered and
+dead-lettered outbox rows of the same age. Deletes run in small batches, each
+its own short transaction with a pause after it, so app writers never wait
+long for the lock. Freed pages are then returned to the filesystem with
+incremental vacuum, a few pages per transaction. Table and index sizes and
+b-tree depths are reported before and after.
+
+    python retention.py                  # one pass, e.g. from cron
+    python retention.py --interval 3600  # keep running, one pass an hour
+    python retention.py --report         # sizes only
+    python retention.py --convert        # one-off: enable incremental vacuum (full VACUUM, locks the db)
+
+``AEGIS_NOTIFICATION_RETENTION_DAYS`` sets the age (default 30).
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+from database import connect, init_database
+from memory_report import format_bytes
+from metrics import REGISTRY
+
+RETENTION_DAYS = int(os.environ.get('AEGIS_NOTIFICATION_RETENTION_DAYS', '30'))
+BATCH_SIZE = 500
+BATCH_PAUSE_SECONDS = 0.05
+VACUUM_STEP_PAGES = 256
+REPORTED_TABLES = ('notifications', 'notification_outbox')
+
+RETENTION_DELETED = REGISTRY.counter('aegis_retention_deleted_total', 'Rows removed by the retention job',
+                                     labels=('table',))
+
+
+def storage_report(conn):
+    """Sizes of the notification tables and their indexes, plus file-level page counts.
+
+    {'objects': [{'name', 'table', 'pages', 'bytes', 'depth'}], 'page_size', 'page_count', 'freelist_count'}.
+    Per-object figures need SQLite's dbstat table; without it only the file totals are filled in.
+    """
+    placeholders = ', '.join('?' * len(REPORTED_TABLES))
+    objects = conn.execute(
+        f"SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index') AND tbl_name IN ({placeholders})"
+        " ORDER BY tbl_name, type DESC, name",
+        REPORTED_TABLES
+    ).fetchall()
+    try:
+        # A page's path has one '/' per level above it, so the deepest page gives the b-tree depth
+        stats = {name: (pages, size, depth) for name, pages, size, depth in conn.execute(
+            "SELECT name, COUNT(*), SUM(pgsize), MAX(length(path) - length(replace(path, '/', ''))) "
+            "FROM dbstat GROUP BY name"
+        )}
+    except sqlite3.OperationalError:  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        stats = {}
+    report = []
+    for name, table in objects:
+        pages, size, depth = stats.get(name, (None, None, None))
+        report.append({'name': name, 'table': table, 'pages': pages, 'bytes': size, 'depth': depth})
+    return {
+        'objects': report,
+        'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        'page_count': conn.execute("PRAGMA page_count").fetchone()[0],
+        'freelist_count': conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+
+def format_report(report):
+    lines = [f"{'object':40} {'pages':>7} {'size':>10} {'depth':>5}"]
+    for obj in report['objects']:
+        size = format_bytes(obj['bytes']) if obj['bytes'] is not None else '-'
+        lines.append(f"{obj['name']:40} {obj['pages'] or '-':>7} {size:>10} {obj['depth'] or '-':>5}")
+    page_size = report['page_size']
+    lines.append(f"file: {report['page_count']} pages ({format_bytes(report['page_count'] * page_size)}), "
+                 f"{report['freelist_count']} free ({format_bytes(report['freelist_count'] * page_size)})")
+    return '\n'.join(lines)
+
+
+def _delete_in_batches(conn, table, where, params, batch_size, pause):
+    """DELETE rows of table matching where, batch_size rows per transaction; returns the count"""
+    deleted = 0
+    while True:
+        cursor = conn.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {where} LIMIT ?)",
+            list(params) + [batch_size]
+        )
+        conn.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return deleted
+        time.sleep(pause)  # let waiting writers in between batches
+
+
+def prune_notifications(conn, max_age_days=RETENTION_DAYS, batch_size=BATCH_SIZE, pause=BATCH_PAUSE_SECONDS, now=None):
+    """Delete notifications and finished outbox rows older than max_age_days; {table: rows deleted}"""
+    cutoff = (now or datetime.now()) - timedelta(days=max_age_days)
+    # Pending outbox rows of deleted notifications go with them (trigger); sent and dead ones age out here
+    deleted = {'notification_outbox': 0}
+    for channel in ('email', 'webhook'):
+        for status in ('sent', 'dead'):
+            deleted['notification_outbox'] += _delete_in_batches(
+                conn, 'notification_outbox', "channel = ? AND status = ? AND next_attempt_at < ?",
+                (channel, status, cutoff), batch_size, pause)
+    deleted['notifications'] = _delete_in_batches(
+        conn, 'notifications', "scheduled_time < ?", (cutoff,), batch_size, pause)
+    for table, count in deleted.items():
+        RETENTION_DELETED.inc(count, table=table)
+    return deleted
+
+
+def incremental_vacuum(conn, step_pages=VACUUM_STEP_PAGES, pause=BATCH_PAUSE_SECONDS):
+    """Release free pages step_pages at a time; returns pages released, or None if auto_vacuum isn't incremental"""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return None
+    released = 0
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while free:
+        # executescript steps the pragma to completion; execute() would free a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({step_pages});")
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        released += free - remaining
+        free = remaining
+        time.sleep(pause)
+    return released
+
+
+def convert_to_incremental(conn):
+    """Switch an existing database to incremental auto-vacuum (rewrites the file once)"""
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def run_once(max_age_days=RETENTION_DAYS, batch_size=BATCH_SIZE, pause=BATCH_PAUSE_SECONDS):
+    conn = connect()
+    try:
+        print("Before:\n" + format_report(storage_report(conn)))
+        started = time.perf_counter()
+        deleted = prune_notifications(conn, max_age_days, batch_size, pause)
+        released = incremental_vacuum(conn, pause=pause)
+        conn.execute("PRAGMA optimize")  # refresh planner stats after large deletes
+        print(f"Deleted {deleted['notifications']} notifications and {deleted['notification_outbox']} outbox rows "
+              f"older than {max_age_days} days in {time.perf_counter() - started:.2f}s")
+        if released is None:
+            print("auto_vacuum is not incremental, so free pages stay in the file; run with --convert once")
+        else:
+            print(f"Released {released} free pages")
+        print("After:\n" + format_report(storage_report(conn)))
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=RETENTION_DAYS, help='delete notifications older than this')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='rows deleted per transaction')
+    parser.add_argument('--pause', type=float, default=BATCH_PAUSE_SECONDS, help='seconds between transactions')
+    parser.add_argument('--interval', type=float, help='repeat every INTERVAL seconds')
+    parser.add_argument('--report', action='store_true', help='print sizes and exit')
+    parser.add_argument('--convert', action='store_true', help='enable incremental vacuum and exit')
+    args = parser.parse_args(argv)
+    init_database()
+
+    if args.report or args.convert:
+        conn = connect()
+        if args.convert:
+            convert_to_incremental(conn)
+        print(format_report(storage_report(conn)))
+        conn.close()
+        return 0
+    while True:
+        run_once(args.days, args.batch, args.pause)
+        if not args.interval:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
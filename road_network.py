@@ -0,0 +1,165 @@
+"""Offline road-network travel times for the hospital finder.
+
+``compile_network`` turns a road edge list (one row per road segment, as
+exported from an OSM extract) into a columnar file holding the directed graph
+in CSR form with travel time in seconds as the edge weight. Queries snap the
+user and the facilities to their nearest road nodes and run one bounded
+Dijkstra from the user, so every candidate's drive time comes out of a single
+one-to-many search.
+
+Without a compiled network, or for points more than ``MAX_SNAP_KM`` from any
+road node (outside the extract), times are estimated from straight-line
+distance.
+
+    python road_network.py compile data/roads.csv [data/roads.network]
+
+Edge CSV columns: u_lat, u_lng, v_lat, v_lng, speed_kmh, oneway
+"""
+import os
+import sys
+import csv
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from columnar import map_sections, write_sections
+from hospital_index import EARTH_RADIUS_KM, _unit_vectors, haversine_km
+
+SOURCE_PATH = os.path.join('data', 'roads.csv')
+NETWORK_PATH = os.path.join('data', 'roads.network')
+
+_MAGIC = b'AEGISRD1'
+DEFAULT_SPEED_KMH = 30.0
+ACCESS_SPEED_KMH = 15.0  # getting from the point itself to the nearest road node
+DETOUR_FACTOR = 1.4  # road distance over straight-line distance in the fallback
+MAX_TRAVEL_SECONDS = 2 * 3600
+MAX_SNAP_KM = 2.0  # farther than this from every road node, the point is off the network
+
+
+def _parse_oneway(value):
+    return str(value).strip().lower() in ('true', '1', 'yes', 'y')
+
+
+def compile_network(source_path=SOURCE_PATH, network_path=NETWORK_PATH):
+    """Build the CSR travel-time graph from a road edge CSV"""
+    with open(source_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    coords = np.array([[float(r['u_lat']), float(r['u_lng']), float(r['v_lat']), float(r['v_lng'])]
+                       for r in rows], dtype=np.float64).reshape(-1, 4)
+    speeds = np.array([float(r.get('speed_kmh') or DEFAULT_SPEED_KMH) for r in rows])
+    oneway = np.array([_parse_oneway(r.get('oneway', '')) for r in rows], dtype=bool)
+
+    # Endpoints that agree to ~10 cm are the same node
+    points = np.round(np.vstack([coords[:, :2], coords[:, 2:]]), 6)
+    nodes, inverse = np.unique(points, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    u, v = inverse[:len(rows)], inverse[len(rows):]
+    seconds = haversine_km(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]) / speeds * 3600
+
+    two_way = ~oneway
+    src = np.concatenate([u, v[two_way]])
+    dst = np.concatenate([v, u[two_way]])
+    weight = np.concatenate([seconds, seconds[two_way]])
+    # Keep the fastest of parallel edges (csr_matrix would sum them)
+    order = np.lexsort((weight, dst, src))
+    src, dst, weight = src[order], dst[order], weight[order]
+    first = np.ones(len(src), dtype=bool)
+    first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst, weight = src[first], dst[first], np.maximum(weight[first], 1e-3)
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+    sections = [
+        ('lat', nodes[:, 0].copy()),
+        ('lng', nodes[:, 1].copy()),
+        ('indptr', indptr),
+        ('indices', dst.astype(np.int32)),
+        ('seconds', weight.astype(np.float32)),
+    ]
+    header = {'nodes': len(nodes), 'edges': int(len(dst)), 'source': os.path.basename(source_path)}
+    return write_sections(network_path, _MAGIC, header, sections)
+
+
+class RoadNetwork:
+    """Directed road graph with snapping and one-to-many travel times"""
+
+    def __init__(self, network_path=NETWORK_PATH):
+        self.header, arrays, self._mmap = map_sections(network_path, _MAGIC)
+        self.lats = arrays['lat']
+        self.lngs = arrays['lng']
+        n = self.header['nodes']
+        self.graph = csr_matrix((arrays['seconds'], arrays['indices'], arrays['indptr']), shape=(n, n))
+        self._tree = cKDTree(_unit_vectors(self.lats, self.lngs))
+
+    def snap(self, lats, lngs):
+        """Return (node ids, km from each point to its node)"""
+        lats, lngs = np.atleast_1d(lats), np.atleast_1d(lngs)
+        chord, nodes = self._tree.query(_unit_vectors(lats, lngs))
+        return nodes, 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+    def travel_seconds(self, lat, lng, target_lats, target_lngs, limit=MAX_TRAVEL_SECONDS, max_snap_km=MAX_SNAP_KM):
+        """Drive time from (lat, lng) to each target and whether the target is on the network.
+
+        Times are inf where unreachable within limit. Returns None when
+        (lat, lng) itself is more than max_snap_km from every road node.
+        """
+        (origin,), (origin_km,) = self.snap(lat, lng)
+        if origin_km > max_snap_km:
+            return None
+        targets, target_km = self.snap(target_lats, target_lngs)
+        access = (origin_km + target_km) / ACCESS_SPEED_KMH * 3600
+        network = dijkstra(self.graph, directed=True, indices=origin, limit=limit)
+        return network[targets] + access, target_km <= max_snap_km
+
+
+def straight_line_seconds(distances_km):
+    """Fallback drive time from great-circle distance"""
+    return np.asarray(distances_km) * DETOUR_FACTOR / DEFAULT_SPEED_KMH * 3600
+
+
+def open_network(source_path=SOURCE_PATH, network_path=NETWORK_PATH):
+    """Open the compiled network (recompiling a newer edge CSV), or None if there is none"""
+    if os.path.exists(source_path) and (
+            not os.path.exists(network_path) or os.path.getmtime(source_path) > os.path.getmtime(network_path)):
+        compile_network(source_path, network_path)
+    return RoadNetwork(network_path) if os.path.exists(network_path) else None
+
+
+_network = None
+_network_loaded = False
+_network_lock = threading.Lock()
+
+
+def get_road_network():
+    """Process-wide road network, or None when no network has been compiled"""
+    global _network, _network_loaded
+    if not _network_loaded:
+        with _network_lock:
+            if not _network_loaded:
+                _network = open_network()
+                _network_loaded = True
+    return _network
+
+
+def travel_minutes(lat, lng, target_lats, target_lngs, distances_km):
+    """Return (minutes per target, per-target bool array: True where the road network gave the time)"""
+    estimate = straight_line_seconds(distances_km)
+    network = get_road_network()
+    result = network.travel_seconds(lat, lng, target_lats, target_lngs) if network and len(distances_km) else None
+    if result is None:
+        return estimate / 60, np.zeros(len(estimate), dtype=bool)
+    seconds, by_road = result
+    return np.where(by_road, seconds, estimate) / 60, by_road
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'compile':
+        out = compile_network(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else NETWORK_PATH)
+        network = RoadNetwork(out)
+        print(f"Wrote {network.header['nodes']} nodes and {network.header['edges']} edges to {out}")
+    else:
+        print("usage: python road_network.py compile <edges.csv> [network_path]")
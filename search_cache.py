@@ -0,0 +1,79 @@
+"""Shared in-process cache for expensive search results.
+
+Entries expire after a TTL and the least recently used entry is evicted
+once the cache is full. Concurrent lookups of a missing key are coalesced:
+the first caller computes the value and the others wait for its result.
+Each lookup carries the dataset generation it was computed against; a new
+generation drops every entry from the old one.
+"""
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SearchCache:
+    """TTL + LRU cache with per-key request coalescing"""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future for the computation in progress
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_compute(self, key, compute, generation=None):
+        """Return the cached value for key, calling compute() at most once per miss"""
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._inflight.clear()
+                self._generation = generation
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            # A reload may have happened while computing; don't cache stale rows
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+        future.set_result(value)
+        return value
@@ -0,0 +1,149 @@
+"""Local stand-in for the inference server used by HttpBackend.
+
+Serves the batched endpoints HttpBackend calls, with a configurable
+artificial latency and failure rate, so the whole HTTP path (pooling,
+micro-batching, timeouts, rule fallback) can be exercised offline:
+
+    python stub_inference_server.py --port 8765 --latency-ms 50
+    AEGIS_MODEL_BACKEND=http streamlit run app.py
+
+or load-tested end to end without Streamlit:
+
+    python stub_inference_server.py --load-test 5000 --concurrency 64
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_analyze(item):
+    symptoms = item.get('symptoms', '').lower()
+    if 'chest pain' in symptoms or 'difficulty breathing' in symptoms:
+        severity, diagnosis = 'CRITICAL', '⚠️ EMERGENCY CONDITION DETECTED'
+    else:
+        severity, diagnosis = 'Low', 'General consultation needed'
+    return {
+        'diagnosis': diagnosis,
+        'severity': severity,
+        'recommendations': ['Stub recommendation from the local inference server'],
+        'professional_note': '',
+    }
+
+
+def stub_chat(item):
+    return {'answer': f"🩺 **Stub Answer:**\n\nYou asked: {item.get('question', '')}"}
+
+
+HANDLERS = {'/v1/analyze': stub_analyze, '/v1/chat': stub_chat}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so client pooling is exercised
+    latency = 0.0
+    fail_rate = 0.0
+    counters = {'requests': 0, 'inputs': 0}
+    counters_lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, dict(self.counters))
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        handler = HANDLERS.get(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if handler is None:
+            self._reply(404, {'error': 'not found'})
+            return
+        inputs = json.loads(body)['inputs']
+        with self.counters_lock:
+            self.counters['requests'] += 1
+            self.counters['inputs'] += len(inputs)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._reply(503, {'error': 'injected failure'})
+            return
+        self._reply(200, {'outputs': [handler(item) for item in inputs]})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=8765, latency_ms=0, fail_rate=0.0):
+    StubHandler.latency = latency_ms / 1000
+    StubHandler.fail_rate = fail_rate
+    return ThreadingHTTPServer((host, port), StubHandler)
+
+
+def load_test(server, n_calls, concurrency, timeout):
+    """Fire n_calls analyze requests from `concurrency` threads through HttpBackend"""
+    from concurrent.futures import ThreadPoolExecutor
+    from model_backend import HttpBackend, RuleBasedBackend
+
+    rules = RuleBasedBackend(lambda s, u: ('rules', 'Low', [], ''), lambda q, u: iter(['rules']))
+    host, port = server.server_address[:2]
+    backend = HttpBackend(f'http://{host}:{port}', fallback=rules, timeout=timeout,
+                          max_concurrency=concurrency)
+    latencies = []
+
+    def one_call(i):
+        started = time.perf_counter()
+        backend.analyze(f'symptom report {i}')
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one_call, range(n_calls)))
+    elapsed = time.perf_counter() - started
+    backend.close()
+
+    latencies.sort()
+    print(f"{n_calls} calls in {elapsed:.2f}s ({n_calls / elapsed:.0f}/s)")
+    print(f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms")
+    print(f"HTTP requests {StubHandler.counters['requests']} for {StubHandler.counters['inputs']} inputs, "
+          f"rule fallbacks {backend.stats['fallbacks']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--load-test', type=int, metavar='N', help='run N client calls against the stub and exit')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, 0 if args.load_test else args.port, args.latency_ms, args.fail_rate)
+    if args.load_test:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        load_test(server, args.load_test, args.concurrency, args.timeout)
+        server.shutdown()
+        return 0
+
+    print(f"Stub inference server on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Shared fixtures: run each test from a scratch copy of data/ so nothing is written into the tree"""
+import os
+import sys
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Empty working directory with the bundled data/ files (medical_app.db and indexes land here)"""
+    shutil.copytree(os.path.join(ROOT, 'data'), tmp_path / 'data',
+                    ignore=shutil.ignore_patterns('*.bin', '*.idx', '*.facilities', '*.network'))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,12 @@
+import assistant
+
+
+def test_medical_chatbot_response_returns_text(workdir):
+    answer = assistant.medical_chatbot_response("I have a fever and chills")
+    assert isinstance(answer, str) and answer.strip()
+
+
+def test_medical_chatbot_response_keeps_user_type_prefix(workdir):
+    answer = assistant.medical_chatbot_response("how do I manage stress", user_type='medical_student')
+    assert answer.startswith("📚 **Educational Response:** ")
+    assert len(answer) > len("📚 **Educational Response:** ")
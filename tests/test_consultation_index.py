@@ -0,0 +1,27 @@
+import consultation_index
+import database
+from consultation_index import ConsultationIndex
+
+
+def test_first_save_is_indexed_once(workdir, monkeypatch):
+    monkeypatch.setattr(consultation_index, '_index', None)
+    database.init_database()
+    cid = database.save_consultation(1, "fever and headache", "flu", "rest", "Low")
+
+    index = consultation_index.get_consultation_index()
+    assert len(index) == 1
+    matches = index.query("fever and headache", k=5)
+    assert [m[0] for m in matches] == [cid]
+
+
+def test_add_skips_ids_already_indexed(workdir):
+    index = ConsultationIndex(index_dir=str(workdir / 'index'), db_path=str(workdir / 'none.db'))
+    index.add_many([(1, 1, "sore throat"), (2, 1, "sore throat and cough")])
+    index.add_many([(2, 1, "sore throat and cough"), (1, 1, "sore throat")])
+    assert len(index) == 2
+
+    # A second process sharing the files sees the rows and does not re-append them
+    other = ConsultationIndex(index_dir=str(workdir / 'index'), db_path=str(workdir / 'none.db'))
+    other.add(2, 1, "sore throat and cough")
+    assert len(other) == 2
+    assert sorted(m[0] for m in other.query("sore throat", k=5)) == [1, 2]
@@ -0,0 +1 @@
+"""Page modules; each exposes render(user) and is imported by app.render_page on first visit"""
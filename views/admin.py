@@ -0,0 +1,98 @@
+"""Operational panels for the usernames listed in AEGIS_ADMIN_USERS"""
+import os
+import sys
+import uuid
+import functools
+from collections import deque
+
+import streamlit as st
+
+import profiler
+from memory_report import SessionRegistry, format_bytes, process_rss_bytes, session_footprint
+from metrics import REGISTRY
+
+# Usernames allowed to see operational panels (comma separated)
+ADMIN_USERS = {u.strip() for u in os.environ.get('AEGIS_ADMIN_USERS', '').split(',') if u.strip()}
+
+PROFILE_HISTORY = 10  # completed reruns (full or fragment) kept per session
+MEMORY_SAMPLE_RERUNS = 25  # non-admin sessions re-measure their state this often, or when its keys change
+
+def is_admin(user):
+    return bool(user) and user.get('username') in ADMIN_USERS
+
+@st.cache_resource(show_spinner=False)
+def get_session_registry():
+    registry = SessionRegistry()
+    REGISTRY.gauge('aegis_active_sessions', 'Sessions seen in the last 30 minutes').set_function(
+        lambda: registry.snapshot()['sessions'])
+    REGISTRY.gauge('aegis_process_resident_memory_bytes', 'Resident set size of this process').set_function(
+        process_rss_bytes)
+    return registry
+
+def render_memory_report():
+    """Record this session's state size; admins get the per-session and process report"""
+    session_id = st.session_state.setdefault('memory_session_id', uuid.uuid4().hex)
+    admin = is_admin(st.session_state.user)
+    # deep_sizeof walks the whole state, so other sessions only re-measure every
+    # MEMORY_SAMPLE_RERUNS reruns or when a key appears or goes away
+    keys = frozenset(str(key) for key in st.session_state.keys()) - {'memory_sample'}
+    reruns, sampled_keys, total = st.session_state.get('memory_sample', (0, None, 0))
+    if admin or keys != sampled_keys or reruns + 1 >= MEMORY_SAMPLE_RERUNS:
+        footprint = [(key, size) for key, size in session_footprint(st.session_state) if key != 'memory_sample']
+        total = sum(size for _, size in footprint)
+        reruns = -1
+    st.session_state.memory_sample = (reruns + 1, keys, total)
+    registry = get_session_registry()
+    registry.record(session_id, total, st.session_state.user.get('username') if st.session_state.user else None)
+    if not admin:
+        return
+    import pandas as pd  # only admins pay for pandas here
+
+    summary = registry.snapshot()
+    with st.sidebar.expander("🧮 Memory Report"):
+        st.markdown(f"**This session:** {format_bytes(total)}")
+        st.dataframe(pd.DataFrame(
+            [(key, format_bytes(size)) for key, size in footprint[:15]], columns=["Key", "Size"]
+        ), hide_index=True, use_container_width=True)
+        st.markdown(f"**Active sessions:** {summary['sessions']} · "
+                    f"mean {format_bytes(summary['mean_bytes'])} · max {format_bytes(summary['max_bytes'])}")
+        if summary['process_rss_bytes']:
+            st.markdown(f"**Process RSS:** {format_bytes(summary['process_rss_bytes'])}")
+        # Only report the search cache once the hospitals page has loaded it
+        hospitals = sys.modules.get('views.hospitals')
+        if hospitals is not None:
+            cache = hospitals.get_hospital_search_cache()
+            st.caption(f"Shared hospital search cache: {len(cache)} entries, {cache.stats}")
+
+def _record_profile(summary):
+    st.session_state.setdefault('profile_history', deque(maxlen=PROFILE_HISTORY)).append(summary)
+
+def profiled_run(name):
+    """Profile a rerun into this session's history (no-op unless AEGIS_PROFILE is set)"""
+    return profiler.run(name, sink=_record_profile)
+
+def profiled(name):
+    """Decorator for fragments, which rerun without the script body's profile"""
+    def decorate(func):
+        if not profiler.ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiled_run(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def render_profile_panel():
+    """Admin sidebar panel with the timings of this session's recent reruns"""
+    if not profiler.ENABLED or not is_admin(st.session_state.get('user')):
+        return
+    history = st.session_state.get('profile_history')
+    if not history:
+        return
+    latest = history[-1]
+    with st.sidebar.expander("⏱️ Rerun Profile"):
+        st.markdown(f"**Last {latest['run']}:** {latest['ms']:.1f} ms")
+        st.dataframe(latest['entries'], hide_index=True, use_container_width=True)
+        st.caption("Recent: " + " · ".join(f"{p['run']} {p['ms']:.0f} ms" for p in reversed(history)))
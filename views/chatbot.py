@@ -0,0 +1,172 @@
+"""Medical chatbot page"""
+from datetime import datetime
+
+import streamlit as st
+
+from assistant import medical_chatbot_response_stream
+from database import CHAT_PAGE_SIZE, CHAT_WINDOW, clear_chat_messages, export_chat_messages, get_chat_messages, save_chat_message
+from profiler import section
+from views.admin import profiled
+
+def render_chat_turn(question, answer):
+    """Render one question/answer pair as chat bubbles"""
+    # User message
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                color: white; padding: 1rem; border-radius: 15px 15px 5px 15px; 
+                margin: 0.5rem 0; margin-left: 20%;">
+        <strong>You:</strong> {question}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # AI response
+    st.markdown(f"""
+    <div style="background: white; color: #2d3436; padding: 1rem; 
+                border-radius: 15px 15px 15px 5px; margin: 0.5rem 0; 
+                margin-right: 20%; box-shadow: 0 2px 8px rgba(0,0,0,0.1); 
+                border-left: 4px solid #00b894;">
+        <strong>🩺 MediBot:</strong><br>{answer}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# Button callbacks run before the fragment reruns, so it renders the updated history without st.rerun()
+def load_earlier_chat():
+    st.session_state.chat_earlier_pages += 1
+
+def clear_chat(user_id):
+    clear_chat_messages(user_id)
+    st.session_state.chat_history = []
+    st.session_state.chat_earlier_pages = 0
+
+@st.fragment
+@profiled('fragment.chat')
+def chat_panel(user):
+    """Chat history, question form and chat controls"""
+    st.markdown("## 💬 AI Medical Assistant")
+    st.markdown("Ask questions and get personalized medical information based on your profile.")
+
+    # Voice controls section
+    col1, col2 = st.columns([3, 1])
+
+    with col2:
+        st.markdown("""
+        <div class="voice-controls">
+            <h4 style="color: white; margin-bottom: 1rem;">🎤 Voice Assistant</h4>
+        </div>
+        """, unsafe_allow_html=True)
+
+        voice_enabled = st.checkbox("🎤 Enable Voice Input", value=st.session_state.voice_enabled)
+        st.session_state.voice_enabled = voice_enabled
+
+        if voice_enabled:
+            st.info("🎤 Voice input would be enabled here using Web Speech API in a full deployment")
+            if st.button("🎙️ Start Recording", use_container_width=True):
+                st.success("Recording... (simulated)")
+
+        text_to_speech = st.checkbox("🔊 Text-to-Speech Response")
+        if text_to_speech:
+            st.info("🔊 AI responses would be read aloud using browser's speech synthesis")
+
+    with col1:
+        # Chat history: only the most recent turns live in session memory
+        user_id = user['id']
+        if 'chat_history' not in st.session_state:
+            st.session_state.chat_history = get_chat_messages(user_id)
+        if 'chat_earlier_pages' not in st.session_state:
+            st.session_state.chat_earlier_pages = 0
+
+        # Display chat history
+        chat_container = st.container()
+
+        with chat_container:
+            oldest_id = st.session_state.chat_history[0][0] if st.session_state.chat_history else None
+            if oldest_id is not None:
+                # Older turns are read from the database on demand and never kept in session
+                shown = st.session_state.chat_earlier_pages * CHAT_PAGE_SIZE
+                earlier = get_chat_messages(user_id, before_id=oldest_id, limit=shown + 1)
+                if len(earlier) > shown:
+                    st.button("⬆️ Load earlier messages", use_container_width=True, on_click=load_earlier_chat)
+                    earlier = earlier[1:]
+                for _, question, answer in earlier:
+                    render_chat_turn(question, answer)
+
+            for _, question, answer in st.session_state.chat_history:
+                render_chat_turn(question, answer)
+
+        # Placeholder so a streamed answer appears right after the history
+        live_turn = st.container()
+
+        # New question input
+        with st.form("chat_form", clear_on_submit=True):
+            col_input, col_submit = st.columns([4, 1])
+
+            with col_input:
+                question = st.text_input(
+                    "Ask your health question:",
+                    placeholder="e.g., What are the symptoms of diabetes? How do I manage high blood pressure?",
+                    label_visibility="collapsed"
+                )
+
+            with col_submit:
+                ask_button = st.form_submit_button("💬 Ask", use_container_width=True)
+
+            # Quick question buttons
+            st.markdown("**Quick Questions:**")
+            quick_questions = [
+                "What should I do for a fever?",
+                "How do I treat a headache?", 
+                "What are signs of dehydration?",
+                "When should I see a doctor?"
+            ]
+
+            cols = st.columns(len(quick_questions))
+            for i, quick_q in enumerate(quick_questions):
+                with cols[i]:
+                    if st.form_submit_button(quick_q.split('?')[0] + '?', use_container_width=True):
+                        question = quick_q
+                        ask_button = True
+
+        # Stream the answer as it is produced, then persist the full turn
+        if ask_button and question:
+            with live_turn:
+                st.markdown(f"""
+                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                            color: white; padding: 1rem; border-radius: 15px 15px 5px 15px; 
+                            margin: 0.5rem 0; margin-left: 20%;">
+                    <strong>You:</strong> {question}
+                </div>
+                """, unsafe_allow_html=True)
+
+                st.markdown("**🩺 MediBot:**")
+                with section('chatbot.answer'):
+                    answer = st.write_stream(
+                        medical_chatbot_response_stream(question, user.get('user_type', 'patient'))
+                    )
+                message_id = save_chat_message(user_id, question, answer)
+                st.session_state.chat_history.append((message_id, question, answer))
+                st.session_state.chat_history = st.session_state.chat_history[-CHAT_WINDOW:]
+
+                # Simulate text-to-speech
+                if text_to_speech:
+                    st.success("🔊 Response would be read aloud")
+
+        # Chat controls
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("🗑️ Clear Chat History", use_container_width=True, on_click=clear_chat, args=(user_id,))
+
+        with col2:
+            if st.session_state.chat_history:
+                # Built from the database only when the download is actually requested
+                username = user['username']
+                st.download_button(
+                    label="📥 Export Chat",
+                    data=lambda: export_chat_messages(user_id, username),
+                    file_name=f"chat_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
+
+def render(user):
+    chat_panel(user)
@@ -0,0 +1,249 @@
+"""Hospital finder page"""
+import math
+
+import folium
+from folium.plugins import FastMarkerCluster, MarkerCluster
+import streamlit as st
+import streamlit.components.v1 as components
+
+from hospital_index import get_hospital_index, KM_PER_MILE
+from gazetteer import get_gazetteer
+from road_network import travel_minutes
+from metrics import REGISTRY
+from search_cache import SearchCache
+from profiler import timed
+from views.admin import profiled
+
+# Enhanced map function with clustering and cached rendering
+MAP_MARKER_LIMIT = 200  # above this, markers are built client-side by FastMarkerCluster
+MAX_HOSPITAL_RESULTS = 500  # nearest matches kept per search, so "Any" distance stays bounded
+
+FAST_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'plus', prefix: 'fa', markerColor: row[3] ? 'red' : 'blue'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    var popup = document.createElement('div');
+    [row[2], row[5], 'Rating: ' + row[4] + '/5', 'Emergency: ' + (row[3] ? 'Yes' : 'No')].forEach(function (line) {
+        var item = document.createElement('div');
+        item.textContent = line;
+        popup.appendChild(item);
+    });
+    marker.bindTooltip(row[2]);
+    marker.bindPopup(popup);
+    return marker;
+}
+"""
+
+@timed('hospitals.map')
+@st.cache_data(show_spinner=False, max_entries=128)
+def get_hospital_map(facility_ids, center, generation=0):
+    """Render the results map to HTML, cached on the normalized (ids, center, dataset generation) key"""
+    index = get_hospital_index()
+    hospitals = [index.record(i) for i in facility_ids]
+    # Calculate the average latitude and longitude for better centering
+    if hospitals:
+        avg_lat = sum(h['lat'] for h in hospitals) / len(hospitals)
+        avg_lng = sum(h['lng'] for h in hospitals) / len(hospitals)
+        map_center = [avg_lat, avg_lng]
+    else:
+        map_center = list(center)
+    m = folium.Map(location=map_center, zoom_start=14, tiles=None, prefer_canvas=True)
+    folium.TileLayer(
+        tiles='https://mt1.google.com/vt/lyrs=r&x={x}&y={y}&z={z}',
+        attr='Google',
+        name='Google Maps',
+        overlay=False,
+        control=True
+    ).add_to(m)
+    
+    if len(hospitals) > MAP_MARKER_LIMIT:
+        # Ship compact rows and let the browser build markers per visible cluster
+        rows = [[h['lat'], h['lng'], h['name'], h['emergency'], h['rating'], h['phone']] for h in hospitals]
+        FastMarkerCluster(rows, callback=FAST_MARKER_CALLBACK).add_to(m)
+    else:
+        cluster = MarkerCluster().add_to(m)
+        for hospital in hospitals:
+            popup_text = f"""
+            <div style='width: 200px;'>
+            <b>{hospital['name']}</b><br>
+            <i class='fa fa-map-marker'></i> {hospital['address']}<br>
+            <i class='fa fa-phone'></i> {hospital['phone']}<br>
+            <i class='fa fa-star'></i> Rating: {hospital['rating']}/5<br>
+            <i class='fa fa-ambulance'></i> Emergency: {'Yes' if hospital['emergency'] else 'No'}<br>
+            <a href='https://www.google.com/maps/search/?api=1&query={hospital['lat']},{hospital['lng']}' target='_blank'>Open in Google Maps</a>
+            </div>
+            """
+            folium.Marker(
+                [hospital['lat'], hospital['lng']],
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=hospital['name'],
+                icon=folium.Icon(
+                    color='red' if hospital['emergency'] else 'blue',
+                    icon='plus',
+                    prefix='fa'
+                )
+            ).add_to(cluster)
+    
+    return m.get_root().render()
+
+# Hospital finder backed by the spatial facility index
+@timed('hospitals.find_nearby', rows=True)
+def find_nearby_hospitals(lat, lng, max_distance_km=None, emergency_only=False, specialties=(), min_rating=None,
+                          limit=MAX_HOSPITAL_RESULTS):
+    """Return up to limit facilities around (lat, lng) passing the filters, nearest first, with distance_km set"""
+    index = get_hospital_index()
+    # Filters run on the attribute bitsets; only the nearest matching rows become dicts
+    indices, distances = index.search(lat, lng, max_distance_km, emergency_only, specialties, min_rating, limit)
+    # One bounded Dijkstra from the user covers every candidate
+    minutes, by_road = travel_minutes(lat, lng, index.lats[indices], index.lngs[indices], distances)
+    return [dict(index.record(i), distance_km=round(float(d), 2),
+                 travel_min=round(float(m), 1) if math.isfinite(m) else None, travel_by_road=bool(r))
+            for i, d, m, r in zip(indices, distances, minutes, by_road)]
+
+SEARCH_CELL_DEG = 0.001  # ~110 m; searches from the same cell share results
+HOSPITAL_SORTS = {
+    "Travel Time": lambda x: (x['travel_min'] is None, x['travel_min'] or 0),
+    "Rating": lambda x: -x['rating'],
+    "Emergency Services": lambda x: not x['emergency'],
+    "Specialties": lambda x: -len(x.get('specialties', [])),
+}
+
+@st.cache_resource(show_spinner=False)
+def get_hospital_search_cache():
+    cache = SearchCache(max_entries=256, ttl=600)
+    REGISTRY.register_cache('hospital_search', cache.stats)
+    return cache
+
+@timed('hospitals.search')
+def search_hospitals(lat, lng, max_distance_km, emergency_only, specialties, min_rating, sort_by):
+    """Filtered and sorted facilities, shared across sessions; returns (hospitals, map_key)"""
+    generation = get_hospital_index().generation
+    cell = (round(lat / SEARCH_CELL_DEG), round(lng / SEARCH_CELL_DEG))
+    center = (round(cell[0] * SEARCH_CELL_DEG, 4), round(cell[1] * SEARCH_CELL_DEG, 4))
+    key = (cell, None if max_distance_km is None else round(max_distance_km, 3), bool(emergency_only),
+           tuple(sorted(set(specialties))), round(float(min_rating), 1), sort_by)
+
+    def compute():
+        # Results come back nearest first, so "Distance" needs no extra sort
+        hospitals = find_nearby_hospitals(center[0], center[1], max_distance_km, emergency_only, key[3], key[4])
+        if sort_by in HOSPITAL_SORTS:
+            hospitals.sort(key=HOSPITAL_SORTS[sort_by])
+        # The map is rendered (and cached) from this normalized key
+        map_key = (tuple(sorted(h['id'] for h in hospitals)), center, generation)
+        return tuple(hospitals), map_key
+
+    return get_hospital_search_cache().get_or_compute(key, compute, generation)
+
+@st.fragment
+@profiled('fragment.hospitals')
+def hospital_finder():
+    """Search form, results map and facility list"""
+    st.markdown("## 🏥 Hospital & Healthcare Facility Finder")
+    st.markdown("Locate nearby hospitals, urgent care centers, and specialized medical facilities.")
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+
+    with col1:
+        city = st.text_input("🏙️ City or PIN code", value=st.session_state.get('hospital_city', 'Chennai'), key='hospital_city')
+
+    with col2:
+        state = st.text_input("🗺️ State", value=st.session_state.get('hospital_state', 'Tamil Nadu'), key='hospital_state')
+
+    with col3:
+        emergency_only = st.checkbox("🚨 Emergency Only", value=False)
+
+    # Resolve the search center offline; offer prefix matches when the name is not exact
+    gazetteer = get_gazetteer()
+    search_place = gazetteer.resolve(city, state)
+    if search_place is None:
+        suggestions = gazetteer.search(city, state) or gazetteer.search(city)
+        if suggestions:
+            search_place = st.selectbox(
+                "📍 Did you mean:", suggestions,
+                format_func=lambda p: f"{p['name']}, {p['state']}" + (f" ({p['pincode']})" if p['pincode'] else "")
+            )
+        else:
+            st.warning(f"📍 '{city}' was not found in the offline gazetteer. Try a nearby city or a PIN code.")
+    else:
+        st.caption(f"📍 {search_place['name']}, {search_place['state']} · {search_place['lat']:.4f}, {search_place['lng']:.4f}")
+
+    # Search filters
+    with st.expander("🔍 Advanced Search Filters"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            specialty_filter = st.multiselect(
+                "Specialties:",
+                ["Emergency Medicine", "Cardiology", "Neurology", "Pediatrics", 
+                 "Surgery", "Orthopedics", "Oncology", "Mental Health"]
+            )
+
+            min_rating = st.slider("Minimum Rating:", 1.0, 5.0, 3.0, 0.1)
+
+        with col2:
+            max_distance = st.selectbox("Maximum Distance:", 
+                                      ["5 miles", "10 miles", "25 miles", "50 miles", "Any"])
+
+            sort_by = st.selectbox("Sort by:", 
+                                 ["Distance", "Travel Time", "Rating", "Emergency Services", "Specialties"])
+
+    # --- Only create/update the map when the button is pressed ---
+    if st.button("🔍 Find Healthcare Facilities", use_container_width=True, type="primary",
+                 disabled=search_place is None):
+        with st.spinner("🔍 Searching for healthcare facilities..."):
+            max_distance_km = None if max_distance == "Any" else int(max_distance.split()[0]) * KM_PER_MILE
+            # Session keeps only the query; records and map live in the shared caches
+            st.session_state.hospital_query = (
+                search_place['lat'], search_place['lng'], max_distance_km,
+                emergency_only, tuple(specialty_filter), min_rating, sort_by
+            )
+            hospitals, _ = search_hospitals(*st.session_state.hospital_query)
+            if not hospitals:
+                st.warning("No facilities found matching your criteria. Try adjusting your filters.")
+
+    # --- Always display the map and results from session state (never recreate here) ---
+    if 'hospital_query' in st.session_state:
+        hospital_results, hospital_map_key = search_hospitals(*st.session_state.hospital_query)
+        st.markdown('<div class="map-container">', unsafe_allow_html=True)
+        components.html(get_hospital_map(*hospital_map_key), height=400)
+        st.markdown('</div>', unsafe_allow_html=True)
+        if hospital_results:
+            st.markdown(f"### 🏥 Found {len(hospital_results)} Healthcare Facilities")
+            if len(hospital_results) >= MAX_HOSPITAL_RESULTS:
+                st.caption(f"Showing the {MAX_HOSPITAL_RESULTS} nearest matches; narrow the distance to see others.")
+            st.markdown("---")
+            for hospital in hospital_results:
+                emergency_badge = "🚨 Emergency" if hospital['emergency'] else "🏥 General"
+                rating_stars = "⭐" * int(hospital['rating']) + "☆" * (5 - int(hospital['rating']))
+                distance_label = f"{hospital['distance_km'] / KM_PER_MILE:.1f} mi"
+                if hospital.get('travel_min') is None:
+                    travel_label = "🚗 not reachable by road"
+                else:
+                    travel_label = f"🚗 ~{hospital['travel_min']:.0f} min" + ("" if hospital['travel_by_road'] else " (est.)")
+                with st.expander(f"{emergency_badge} | {hospital['name']} | {distance_label} | {travel_label} | {rating_stars} ({hospital['rating']})"):
+                    col1, col2 = st.columns([2, 1])
+                    with col1:
+                        st.markdown(f"**📍 Address:** {hospital['address']}")
+                        st.markdown(f"**📞 Phone:** {hospital['phone']}")
+                        st.markdown(f"**🏥 Bed Capacity:** {hospital.get('beds', 'N/A')}")
+                        st.markdown(f"**🚨 Emergency Services:** {'Available 24/7' if hospital['emergency'] else 'Not Available'}")
+                        if hospital.get('specialties'):
+                            st.markdown(f"**🔬 Specialties:** {', '.join(hospital['specialties'])}")
+                    with col2:
+                        st.markdown(f"**⭐ Rating:** {hospital['rating']}/5.0")
+                        st.markdown(f"**📏 Distance:** {distance_label} ({hospital['distance_km']:.1f} km)")
+                        st.markdown(f"**⏱️ Travel Time:** {travel_label[2:]}")
+                        if st.button(f"📞 Call {hospital['name']}", key=f"call_{hospital['id']}"):
+                            st.success(f"Calling {hospital['phone']}... (simulated)")
+                        origin = hospital_map_key[1]
+                        st.link_button(
+                            "🗺️ Get Directions",
+                            f"https://www.google.com/maps/dir/?api=1&origin={origin[0]},{origin[1]}"
+                            f"&destination={hospital['lat']},{hospital['lng']}&travelmode=driving"
+                        )
+                        if hospital['emergency']:
+                            if st.button(f"🚨 Emergency Contact", key=f"emergency_{hospital['id']}", type="primary"):
+                                st.error(f"🚨 Contacting {hospital['name']} emergency department...")
+
+def render(user):
+    hospital_finder()
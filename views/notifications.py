@@ -0,0 +1,122 @@
+"""Notification center page"""
+from datetime import datetime
+
+import streamlit as st
+
+from database import (NOTIFICATION_PAGE_SIZE, dismiss_notifications, get_notification_counts, get_notification_preferences,
+                      get_notifications, mark_notifications_read, save_notification_preferences)
+from views.admin import profiled
+
+# Button callbacks run before the fragment reruns, so it renders the updated inbox without st.rerun()
+def mark_read(user_id, notification_ids=None):
+    mark_notifications_read(user_id, notification_ids)
+    for notification in st.session_state.notifications:
+        if notification_ids is None or notification['id'] in notification_ids:
+            notification['read'] = True
+
+def dismiss_all(user_id):
+    dismiss_notifications(user_id)
+    st.session_state.notifications.clear()
+    st.session_state.notification_pages = {}
+
+def turn_page(notification_type, step):
+    pages = st.session_state.setdefault('notification_pages', {})
+    pages[notification_type] = max(0, pages.get(notification_type, 0) + step)
+
+@st.fragment
+@profiled('fragment.notifications')
+def notification_feed(user):
+    """Inbox grouped by type, one SQL page per type"""
+    counts = get_notification_counts(user['id'])
+    if counts:
+        total = sum(t for t, _ in counts.values())
+        unread = sum(u for _, u in counts.values())
+        st.markdown(f"### 📬 Your Notifications ({total}, {unread} unread)")
+
+        pages = st.session_state.setdefault('notification_pages', {})
+        for notif_type, (type_total, type_unread) in counts.items():
+            type_icon = "💧" if notif_type == 'water' else "💊" if notif_type == 'medicine' else "🔔"
+            type_name = notif_type.replace('_', ' ').title()
+            page_count = -(-type_total // NOTIFICATION_PAGE_SIZE)
+            page = min(pages.get(notif_type, 0), page_count - 1)
+
+            label = f"{type_icon} {type_name} ({type_total}" + (f", {type_unread} unread)" if type_unread else ")")
+            with st.expander(label):
+                notifications = get_notifications(user['id'], notif_type, limit=NOTIFICATION_PAGE_SIZE,
+                                                  offset=page * NOTIFICATION_PAGE_SIZE)
+                for notif in notifications:
+                    st.markdown(f"""
+                    <div style="background: white; padding: 0.75rem; border-radius: 8px; 
+                               margin: 0.25rem 0; border-left: 3px solid {'#b2bec3' if notif['read'] else '#667eea'};">
+                        {'' if notif['read'] else '🆕 '}<strong>{notif['message']}</strong>
+                        <br><small style="color: #636e72;">⏰ {notif['time']}</small>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col1:
+                    st.button("◀ Newer", key=f"notif_newer_{notif_type}", disabled=page == 0,
+                              on_click=turn_page, args=(notif_type, -1))
+                with col2:
+                    unread_ids = [n['id'] for n in notifications if not n['read']]
+                    st.button("✅ Mark page as read", key=f"notif_read_{notif_type}", disabled=not unread_ids,
+                              on_click=mark_read, args=(user['id'], unread_ids))
+                with col3:
+                    st.button("Older ▶", key=f"notif_older_{notif_type}", disabled=page >= page_count - 1,
+                              on_click=turn_page, args=(notif_type, 1))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("✅ Mark All as Read", disabled=not unread, on_click=mark_read, args=(user['id'],))
+        with col2:
+            st.button("🗑️ Clear All Notifications", type="secondary", on_click=dismiss_all, args=(user['id'],))
+
+    else:
+        st.info("📭 No notifications yet. Your reminders and alerts will appear here.")
+
+def render(user):
+    st.markdown("## 🔔 Notification Center")
+
+    tab1, tab2 = st.tabs(["📬 All Notifications", "⚙️ Settings"])
+
+    with tab1:
+        notification_feed(user)
+
+    with tab2:
+        st.markdown("### ⚙️ Notification Preferences")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("#### 💊 Medicine Reminders")
+            medicine_notifications = st.radio(
+                "Medicine reminder notifications:",
+                ["All reminders", "Critical only", "Disabled"],
+                index=0
+            )
+
+            snooze_duration = st.selectbox(
+                "Snooze duration:",
+                ["5 minutes", "10 minutes", "15 minutes", "30 minutes"]
+            )
+
+            st.markdown("#### 💧 Health Reminders")
+            water_reminders = st.checkbox("Water intake reminders", value=True)
+            exercise_reminders = st.checkbox("Exercise reminders", value=True)
+            sleep_reminders = st.checkbox("Sleep schedule reminders", value=False)
+
+        with col2:
+            st.markdown("#### 🔊 Alert Settings")
+            sound_alerts = st.checkbox("Sound alerts", value=True)
+            channels = get_notification_preferences(user['id'])
+            push_notifications = st.checkbox("Push notifications", value=channels['push'])
+            email_notifications = st.checkbox("Email notifications", value=channels['email'],
+                                              help=f"Reminders are emailed to {user['email']}")
+
+            st.markdown("#### ⏰ Quiet Hours")
+            quiet_start = st.time_input("Quiet hours start:", value=datetime.strptime("22:00", "%H:%M").time())
+            quiet_end = st.time_input("Quiet hours end:", value=datetime.strptime("07:00", "%H:%M").time())
+
+        if st.button("💾 Save Notification Settings", use_container_width=True, type="primary"):
+            save_notification_preferences(user['id'], email_notifications, push_notifications)
+            st.success("✅ Notification preferences saved successfully!")
@@ -0,0 +1,452 @@
+"""Health reports, analytics and data export page"""
+import json
+from datetime import datetime
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from adherence import adherence_summary
+from database import (consultations_since, get_health_rollup, get_user_consultations, get_user_reminder_slots,
+                      get_user_reminders, slot_label)
+from pdf_reports import MERGED_BUNDLE_MAX_REPORTS, export_pdf_bundle, get_pdf_report, merged_pdf_available
+from views.admin import profiled
+
+@st.fragment
+@profiled('fragment.report_history')
+def report_history(user, consultations):
+    """Filterable consultation history with per-report downloads"""
+    # Enhanced filtering
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        severity_filter = st.selectbox(
+            "Filter by Severity:",
+            options=['All', 'CRITICAL', 'High', 'Medium', 'Low']
+        )
+
+    with col2:
+        date_range = st.selectbox(
+            "Date Range:",
+            options=['All Time', 'Last 7 Days', 'Last 30 Days', 'Last 90 Days', 'Last Year']
+        )
+
+    with col3:
+        sort_option = st.selectbox(
+            "Sort by:",
+            options=['Newest First', 'Oldest First', 'Severity (High to Low)', 'Severity (Low to High)']
+        )
+
+    # Apply filters
+    filtered_consultations = consultations.copy()
+
+    if severity_filter != 'All':
+        filtered_consultations = [c for c in filtered_consultations if c[5] == severity_filter]
+
+    if date_range != 'All Time':
+        days_map = {
+            'Last 7 Days': 7, 'Last 30 Days': 30, 
+            'Last 90 Days': 90, 'Last Year': 365
+        }
+        days = days_map[date_range]
+        filtered_consultations = [
+            c for c in filtered_consultations 
+            if (datetime.now() - datetime.strptime(c[6], '%Y-%m-%d %H:%M:%S')).days <= days
+        ]
+
+    # Apply sorting
+    if sort_option == 'Oldest First':
+        filtered_consultations.reverse()
+    elif 'Severity' in sort_option:
+        severity_order = {'CRITICAL': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+        reverse_sort = 'High to Low' in sort_option
+        filtered_consultations.sort(key=lambda x: severity_order.get(x[5], 0), reverse=reverse_sort)
+
+    st.markdown(f"### 📋 Showing {len(filtered_consultations)} consultations")
+
+    # Display consultations with enhanced cards
+    for i, consultation in enumerate(filtered_consultations):
+        severity_colors = {
+            'CRITICAL': '#e74c3c',
+            'High': '#f39c12', 
+            'Medium': '#f1c40f',
+            'Low': '#27ae60'
+        }
+
+        severity_icons = {
+            'CRITICAL': '🚨',
+            'High': '⚠️',
+            'Medium': '🟡',
+            'Low': '✅'
+        }
+
+        color = severity_colors.get(consultation[5], '#95a5a6')
+        icon = severity_icons.get(consultation[5], '📋')
+
+        with st.expander(f"{icon} {consultation[6][:16]} - {consultation[5]} Severity"):
+            st.markdown(f"""
+            <div style="border-left: 4px solid {color}; padding-left: 1rem; margin-bottom: 1rem;">
+                <h4 style="color: {color}; margin-bottom: 0.5rem;">
+                    {icon} {consultation[5]} Priority Case
+                </h4>
+                <p style="margin-bottom: 0.5rem;"><strong>Date:</strong> {consultation[6]}</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            col1, col2 = st.columns([3, 1])
+
+            with col1:
+                st.markdown("**🩺 Reported Symptoms:**")
+                st.write(consultation[2])
+
+                st.markdown("**🔍 AI Assessment:**")
+                st.write(consultation[3])
+
+                st.markdown("**💡 Recommendations:**")
+                recommendations = consultation[4].split(', ')
+                for rec in recommendations:
+                    st.write(f"• {rec}")
+
+            with col2:
+                st.markdown(f"**⚠️ Severity:** {consultation[5]}")
+                st.markdown(f"**📅 Date:** {consultation[6][:10]}")
+                st.markdown(f"**⏰ Time:** {consultation[6][11:16]}")
+
+                # Individual report download
+                consultation_data = {
+                    'date': consultation[6],
+                    'symptoms': consultation[2],
+                    'diagnosis': consultation[3],
+                    'severity': consultation[5],
+                    'recommendations': consultation[4].split(', ')
+                }
+
+                st.download_button(
+                    label="📄 PDF",
+                    data=lambda data=consultation_data, user=user: get_pdf_report(data, user),
+                    file_name=f"report_{consultation[6][:10]}_{i}.pdf",
+                    mime="application/pdf",
+                    key=f"pdf_download_{i}",
+                    use_container_width=True
+                )
+
+def adherence_report(user):
+    """Adherence metrics, daily on-time trend and missed-dose heatmap from the dose log"""
+    adherence = adherence_summary(user['id'])
+    st.markdown("### 💊 Medication Adherence")
+    if adherence is None:
+        st.info("💊 No doses due yet. Add medication reminders and use ✅ Mark as Taken to track adherence.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("⏰ Taken On Time", f"{adherence['on_time_pct']:.1f}%")
+    with col2:
+        st.metric("✅ Taken At All", f"{adherence['taken_pct']:.1f}%")
+    with col3:
+        st.metric("🔥 Current Streak", f"{adherence['current_streak']} days")
+    with col4:
+        st.metric("🏆 Longest Streak", f"{adherence['longest_streak']} days")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 📈 Daily On-Time Doses (last 90 days)")
+        daily = adherence['daily'].tail(90)
+        trend = pd.DataFrame({'On time %': 100.0 * daily['on_time'] / daily['expected']})
+        trend.index = daily['date']
+        st.line_chart(trend)
+    with col2:
+        st.markdown("#### 🗓️ Missed Doses by Weekday and Time")
+        heatmap = adherence['heatmap'].reset_index(names='Weekday').melt(
+            id_vars='Weekday', var_name='Time', value_name='Missed')
+        st.altair_chart(
+            alt.Chart(heatmap).mark_rect().encode(
+                x=alt.X('Time:O'), y=alt.Y('Weekday:O', sort=list(adherence['heatmap'].index)),
+                color=alt.Color('Missed:Q', scale=alt.Scale(scheme='reds')),
+                tooltip=['Weekday', 'Time', 'Missed'],
+            ),
+            use_container_width=True
+        )
+
+def render(user):
+    st.markdown("## 📊 Health Reports & Analytics")
+    st.markdown("Comprehensive view of your health data and consultation history.")
+
+    consultations = get_user_consultations(user['id'])
+    # Metrics and analytics read the per-user rollups
+    rollup = get_health_rollup(user['id'])
+
+    if consultations:
+        # Enhanced analytics dashboard
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("📋 Total Consultations", rollup['total'])
+
+        with col2:
+            critical_count = rollup['severity'].get('CRITICAL', 0)
+            st.metric("⚠️ Critical Cases", critical_count)
+
+        with col3:
+            recent_count = consultations_since(rollup, 30)
+            st.metric("📅 Last 30 Days", recent_count)
+
+        with col4:
+            avg_gap = "N/A"
+            if rollup['total'] > 1:
+                # Mean gap between consecutive consultations = overall span / number of gaps
+                span = (datetime.strptime(rollup['last_at'], '%Y-%m-%d %H:%M:%S')
+                        - datetime.strptime(rollup['first_at'], '%Y-%m-%d %H:%M:%S'))
+                avg_gap = f"{span.days // (rollup['total'] - 1)} days"
+            st.metric("📊 Avg. Gap", avg_gap)
+
+        # Filters and analytics
+        tab1, tab2, tab3 = st.tabs(["📋 Consultation History", "📈 Health Analytics", "💾 Export Data"])
+
+        with tab1:
+            report_history(user, consultations)
+
+        with tab2:
+            st.markdown("### 📈 Health Analytics & Insights")
+
+            if rollup['total'] >= 2:
+                # Health trends analysis
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.markdown("#### 📊 Severity Distribution")
+                    severity_df = pd.DataFrame(
+                        list(rollup['severity'].items()), 
+                        columns=['Severity', 'Count']
+                    )
+                    st.bar_chart(severity_df.set_index('Severity'))
+
+                with col2:
+                    st.markdown("#### 📅 Monthly Activity")
+                    if len(rollup['months']) > 1:
+                        monthly_df = pd.DataFrame(
+                            rollup['months'], 
+                            columns=['Month', 'Consultations']
+                        )
+                        st.line_chart(monthly_df.set_index('Month'))
+                    else:
+                        st.info("Need more data points for trend analysis")
+
+                # Health insights
+                st.markdown("#### 🔍 AI Health Insights")
+
+                # Calculate patterns
+                recent_severity = rollup['recent_severity']  # Last 5 consultations
+                critical_trend = recent_severity.count('CRITICAL')
+                high_trend = recent_severity.count('High')
+
+                if critical_trend > 0:
+                    st.error(f"⚠️ You have {critical_trend} critical case(s) in your recent history. Consider following up with healthcare providers.")
+                elif high_trend >= 2:
+                    st.warning(f"🟡 You have {high_trend} high-priority cases recently. Monitor symptoms and seek medical advice.")
+                else:
+                    st.success("✅ Your recent health consultations show manageable concerns.")
+
+                # Symptom analysis
+                symptom_frequency = rollup['keywords']
+
+                if symptom_frequency:
+                    st.markdown("#### 🎯 Most Reported Symptoms")
+                    for symptom, count in sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:5]:
+                        st.write(f"• **{symptom.title()}:** {count} times")
+
+            else:
+                st.info("📊 More consultation data needed for detailed analytics. Continue using the symptom checker to build your health profile.")
+
+        with tab3:
+            st.markdown("### 💾 Export & Backup Your Health Data")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown("#### 📄 Individual Reports")
+
+                export_format = st.selectbox(
+                    "Choose format:",
+                    ["PDF Report", "JSON Data", "CSV Summary"]
+                )
+
+                # Labels must be unique: Streamlit maps a selection back to its option by label
+                export_options = [(i, f"#{i + 1} · {c[6][:16]} - {c[5]}") for i, c in enumerate(consultations)]
+                selected_consultations = st.multiselect(
+                    "Select consultations to export:",
+                    options=export_options,
+                    format_func=lambda x: x[1],
+                    default=export_options[:3]
+                )
+
+                if export_format == "PDF Report":
+                    bundle_options = ["ZIP of PDFs", "Single merged PDF"] if merged_pdf_available() else ["ZIP of PDFs"]
+                    bundle_format = st.radio("Bundle as:", bundle_options, horizontal=True)
+                    if bundle_format == "Single merged PDF":
+                        st.caption(f"A merged PDF is built in memory, so it takes up to {MERGED_BUNDLE_MAX_REPORTS} "
+                                   "reports; export larger selections as a ZIP.")
+
+                if st.button("📥 Export Selected", use_container_width=True) and selected_consultations:
+                    if export_format == "PDF Report":
+                        # Same content as the history cards, so already-built PDFs come from the report cache
+                        bundle_data = [{
+                            'date': consultations[idx][6],
+                            'symptoms': consultations[idx][2],
+                            'diagnosis': consultations[idx][3],
+                            'severity': consultations[idx][5],
+                            'recommendations': consultations[idx][4].split(', ')
+                        } for idx, _ in selected_consultations]
+                        bundle_names = [f"report_{consultations[idx][6][:10]}_{idx}.pdf" for idx, _ in selected_consultations]
+                        merged = bundle_format == "Single merged PDF"
+                        if merged and len(bundle_data) > MERGED_BUNDLE_MAX_REPORTS:
+                            st.warning(f"Select at most {MERGED_BUNDLE_MAX_REPORTS} reports for a merged PDF, "
+                                       "or export them as a ZIP.")
+                        else:
+                            progress_bar = st.progress(0.0, text="Rendering reports...")
+                            bundle = export_pdf_bundle(
+                                bundle_data, user, bundle_names, merged=merged,
+                                progress=lambda done, total: progress_bar.progress(done / total, text=f"Rendered {done}/{total} reports")
+                            )
+                            progress_bar.empty()
+                            # The bundle stays on disk; Streamlit reads it once into its media store to serve it
+                            with bundle:
+                                st.download_button(
+                                    label=f"📥 Download {len(bundle_data)} Reports",
+                                    data=bundle,
+                                    file_name=f"health_reports_{datetime.now().strftime('%Y%m%d')}.{'pdf' if merged else 'zip'}",
+                                    mime="application/pdf" if merged else "application/zip",
+                                    use_container_width=True
+                                )
+                    elif export_format == "JSON Data":
+                        selected_data = []
+                        for idx, _ in selected_consultations:
+                            consultation = consultations[idx]
+                            selected_data.append({
+                                'date': consultation[6],
+                                'symptoms': consultation[2],
+                                'diagnosis': consultation[3],
+                                'severity': consultation[5],
+                                'recommendations': consultation[4].split(', ')
+                            })
+
+                        export_json = json.dumps({
+                            'user': user['username'],
+                            'export_date': datetime.now().isoformat(),
+                            'consultations': selected_data
+                        }, indent=2)
+
+                        st.download_button(
+                            label="📥 Download JSON Export",
+                            data=export_json,
+                            file_name=f"health_data_export_{datetime.now().strftime('%Y%m%d')}.json",
+                            mime="application/json",
+                            use_container_width=True
+                        )
+
+            with col2:
+                st.markdown("#### 📊 Complete Health Summary")
+
+                if st.button("📋 Generate Comprehensive Report", use_container_width=True):
+                    # Create comprehensive health summary
+                    summary_data = {
+                        'user_profile': {
+                            'username': user['username'],
+                            'user_type': user.get('user_type', 'patient'),
+                            'total_consultations': len(consultations),
+                            'date_range': f"{consultations[-1][6][:10]} to {consultations[0][6][:10]}" if consultations else "N/A"
+                        },
+                        'health_statistics': {
+                            'critical_cases': len([c for c in consultations if c[5] == 'CRITICAL']),
+                            'high_priority': len([c for c in consultations if c[5] == 'High']),
+                            'medium_priority': len([c for c in consultations if c[5] == 'Medium']),
+                            'low_priority': len([c for c in consultations if c[5] == 'Low'])
+                        },
+                        'recent_activity': [
+                            {
+                                'date': c[6],
+                                'severity': c[5],
+                                'symptoms_summary': c[2][:100] + '...' if len(c[2]) > 100 else c[2]
+                            } for c in consultations[:10]
+                        ]
+                    }
+
+                    summary_json = json.dumps(summary_data, indent=2)
+
+                    st.download_button(
+                        label="📥 Download Complete Summary",
+                        data=summary_json,
+                        file_name=f"complete_health_summary_{datetime.now().strftime('%Y%m%d')}.json",
+                        mime="application/json",
+                        use_container_width=True
+                    )
+
+                st.markdown("#### 🔄 Data Backup")
+                st.info("💡 **Tip:** Regularly backup your health data for your records and to share with healthcare providers.")
+
+                if st.button("☁️ Backup All Data", use_container_width=True):
+                    # Complete data backup
+                    reminder_slots = get_user_reminder_slots(user['id'])
+                    backup_data = {
+                        'backup_info': {
+                            'created_date': datetime.now().isoformat(),
+                            'user_id': user['id'],
+                            'username': user['username'],
+                            'backup_version': '1.0'
+                        },
+                        'consultations': [
+                            {
+                                'id': c[0],
+                                'symptoms': c[2],
+                                'diagnosis': c[3],
+                                'recommendations': c[4],
+                                'severity': c[5],
+                                'date': c[6]
+                            } for c in consultations
+                        ],
+                        'reminders': [
+                            {
+                                'medicine_name': r[2],
+                                'dosage': r[3],
+                                'frequency': r[4],
+                                'time_slots': [slot_label(minute) for minute in reminder_slots.get(r[0], [])],
+                                'start_date': r[6],
+                                'end_date': r[7],
+                                'active': r[8]
+                            } for r in get_user_reminders(user['id'])
+                        ]
+                    }
+
+                    backup_json = json.dumps(backup_data, indent=2)
+
+                    st.download_button(
+                        label="📥 Download Complete Backup",
+                        data=backup_json,
+                        file_name=f"aegis_health_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json",
+                        use_container_width=True
+                    )
+
+    else:
+        st.info("📋 No consultation records found. Start by using our Symptom Diagnosis tool to build your health profile!")
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            if st.button("🩺 Start First Diagnosis", use_container_width=True, type="primary"):
+                st.session_state.page = 'diagnosis'
+                st.rerun()
+
+        with col2:
+            if st.button("💬 Ask Health Questions", use_container_width=True):
+                st.session_state.page = 'chatbot'
+                st.rerun()
+
+        with col3:
+            if st.button("🏥 Find Nearby Care", use_container_width=True):
+                st.session_state.page = 'hospitals'
+                st.rerun()
+
+    if get_user_reminders(user['id']):
+        st.markdown("---")
+        adherence_report(user)